@@ -4,6 +4,7 @@ setuptools.setup(
     name='theo-framework',
     version='2.1.2',
     install_requires=['theo-database'],
+    extras_require={'mongodb': ['pymongo']},
     url='https://github.com/TheodoreWon/python-theo-framework',
     license='MIT',
     author='Theodore Won',
@@ -1,4 +1,6 @@
 from theo.src.framework.DictList import DictList
+from theo.src.framework.ConcurrentDictList import ConcurrentDictList
+from theo.src.framework.DictListView import DictListView
 from theo.src.framework.Log import Log
 from theo.src.framework.Component import Component
 from theo.src.framework.System import System
@@ -10,7 +10,11 @@ class Component(metaclass=abc.ABCMeta):
     How to use:
         Copy the example and change the ComponentName
         If the component has a dependency with other components,
-            class the System.get_components() and check the existence.
+            set the names of the components to dependencies, ex. dependencies = ('MongoDBCtrl',)
+            then the component is initialized after the components.
+        If the interfaces of the component should run on its own thread one by one,
+            set worker = True (and mailbox_size to bound the waiting calls, 0 is unbounded).
+        If the component is CPU heavy, set process = True to run it in a child process.
         Define the function, initial and add calling system.register_interface and initial sequence for it.
         Add System.register_component(ComponentName) at program main.
         When main call system.startup_components(), the component will be initialized.
@@ -19,6 +23,11 @@ class Component(metaclass=abc.ABCMeta):
         Please refer the docstings of System
     """
 
+    dependencies = ()
+    worker = False
+    mailbox_size = 0
+    process = False
+
     def __init__(self):
         self.log = Log(type(self).__name__)
 
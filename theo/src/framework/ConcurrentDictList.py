@@ -0,0 +1,219 @@
+import threading
+import functools
+from theo.src.framework.DictList import DictList
+
+
+class RWLock:
+    """
+    RWLock is a reader/writer lock what prefers writers.
+    Many readers can hold the lock together, a writer holds the lock alone.
+    The lock is reentrant in a thread, and a reader of the thread can not become a writer.
+
+    Methods:
+        with lock.read(): ...
+        with lock.write(): ...
+        is_held = lock.is_held() : whether the current thread holds the lock
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = None
+        self.waiting_writers = 0
+        self.local = threading.local()
+
+    def is_held(self):
+        return self.writer == threading.get_ident() or getattr(self.local, 'reads', 0) > 0
+
+    def read(self):
+        return RWLockContext(self.acquire_read, self.release_read)
+
+    def write(self):
+        return RWLockContext(self.acquire_write, self.release_write)
+
+    def acquire_read(self):
+        if self.is_held():
+            self.local.reads = getattr(self.local, 'reads', 0) + 1
+            return
+
+        with self.condition:
+            while self.writer is not None or self.waiting_writers:
+                self.condition.wait()
+            self.readers = self.readers + 1
+
+        self.local.reads = 1
+
+    def release_read(self):
+        self.local.reads = self.local.reads - 1
+        if self.local.reads or self.writer == threading.get_ident():
+            return
+
+        with self.condition:
+            self.readers = self.readers - 1
+            if not self.readers:
+                self.condition.notify_all()
+
+    def acquire_write(self):
+        if self.writer == threading.get_ident():
+            self.local.writes = self.local.writes + 1
+            return
+
+        if getattr(self.local, 'reads', 0):
+            raise RuntimeError('a reader can not become a writer')
+
+        with self.condition:
+            self.waiting_writers = self.waiting_writers + 1
+            while self.writer is not None or self.readers:
+                self.condition.wait()
+            self.waiting_writers = self.waiting_writers - 1
+            self.writer = threading.get_ident()
+
+        self.local.writes = 1
+
+    def release_write(self):
+        self.local.writes = self.local.writes - 1
+        if self.local.writes:
+            return
+
+        with self.condition:
+            self.writer = None
+            self.condition.notify_all()
+
+
+class RWLockContext:
+    def __init__(self, acquire, release):
+        self.acquire = acquire
+        self.release = release
+
+    def __enter__(self):
+        self.acquire()
+
+    def __exit__(self, *exception):
+        self.release()
+
+
+def reading(method):
+    @functools.wraps(method)
+    def wrapper(self, *arguments, **keywords):
+        return self.read(method, *arguments, **keywords)
+
+    return wrapper
+
+
+def writing(method):
+    @functools.wraps(method)
+    def wrapper(self, *arguments, **keywords):
+        with self.lock.write():
+            return method(self, *arguments, **keywords)
+
+    return wrapper
+
+
+def iterating(method):
+    # the elements are collected under the lock, so the caller iterates without holding the lock
+    @functools.wraps(method)
+    def wrapper(self, *arguments, **keywords):
+        return iter(self.read(lambda dictlist: list(method(dictlist, *arguments, **keywords))))
+
+    return wrapper
+
+
+class ConcurrentDictList(DictList):
+    """
+    ConcurrentDictList is DictList what can be shared by threads.
+    The methods of DictList are used as they are. (refer the docstring of DictList)
+
+    Reading methods (get, get_list, get_range, values, exports, etc.) run together with a reader lock.
+    Writing methods (append, extend, remove, imports, etc.) run alone with a writer lock.
+    If the list has an unsorted tail, the first reader sorts the list with the writer lock,
+        and then the next readers run together again.
+    get_list() returns a copy of the stored list and iterators (iter_range, iter_query, iter_jsonl) iterate a copy,
+        so the caller can use the result while other threads write.
+    Walkers run in the writer lock, so a walker can read the list but a walker of an executor should not use the list.
+
+    Methods:
+        dictlist = ConcurrentDictList(key=None, storage='list')
+
+    Example:
+        price_dictlist = ConcurrentDictList(key='date')
+        threading.Thread(target=lambda: price_dictlist.append({'date': '2019-01-02', 'price': 100})).start()
+        print(price_dictlist.get('2019-01-02'))
+    """
+
+    def __init__(self, key=None, storage='list'):
+        super().__init__(key=key, storage=storage)
+
+        self.lock = RWLock()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop('lock', None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.lock = RWLock()
+
+    def read(self, method, *arguments, **keywords):
+        if self.lock.is_held():
+            return method(self, *arguments, **keywords)
+
+        with self.lock.read():
+            if self.key is None or self.sorted:
+                return method(self, *arguments, **keywords)
+
+        with self.lock.write():
+            return method(self, *arguments, **keywords)
+
+    def sort(self):
+        if self.lock.is_held():
+            return DictList.sort(self)
+
+        with self.lock.write():
+            return DictList.sort(self)
+
+    def get_list(self, attr1=None, attr2=None):
+        def get_list(dictlist):
+            data = DictList.get_list(dictlist, attr1, attr2)
+            return list(data) if data is dictlist.data else data
+
+        return self.read(get_list)
+
+    print = reading(DictList.print)
+    count = reading(DictList.count)
+    get = reading(DictList.get)
+    get_range = reading(DictList.get_range)
+    first = reading(DictList.first)
+    last = reading(DictList.last)
+    values = reading(DictList.values)
+    distinct = reading(DictList.distinct)
+    aggregate = reading(DictList.aggregate)
+    group_by = reading(DictList.group_by)
+    export_json = reading(DictList.export_json)
+    export_csv = reading(DictList.export_csv)
+    export_mongodb = reading(DictList.export_mongodb)
+    save_snapshot = reading(DictList.save_snapshot)
+    dump_snapshot = reading(DictList.dump_snapshot)
+
+    iter_range = iterating(DictList.iter_range)
+    iter_query = iterating(DictList.iter_query)
+    iter_jsonl = iterating(DictList.iter_jsonl)
+
+    append = writing(DictList.append)
+    insert = writing(DictList.insert)
+    extend = writing(DictList.extend)
+    extend_list = writing(DictList.extend_list)
+    upsert = writing(DictList.upsert)
+    remove = writing(DictList.remove)
+    pop = writing(DictList.pop)
+    remove_by_key = writing(DictList.remove_by_key)
+    clear = writing(DictList.clear)
+    create_index = writing(DictList.create_index)
+    drop_index = writing(DictList.drop_index)
+    import_json = writing(DictList.import_json)
+    import_jsonl = writing(DictList.import_jsonl)
+    import_csv = writing(DictList.import_csv)
+    import_mongodb = writing(DictList.import_mongodb)
+    export_jsonl = writing(DictList.export_jsonl)
+    plug_in_walker = writing(DictList.plug_in_walker)
+    plug_out_walker = writing(DictList.plug_out_walker)
@@ -1,6 +1,15 @@
 import os
 import json
 import csv
+import threading
+import queue
+import operator
+import heapq
+import pickle
+import struct
+import copy
+import mmap as memory_map
+from theo.src.framework.ColumnarList import ColumnarList
 
 
 class DictList:
@@ -13,9 +22,13 @@ class DictList:
     Attributes:
         key (str, optional): To support sorting and searching algorithm, a key is needed.
                                 If the key is set, all of the element dictionary should includes the key.
+        storage (str, optional): 'list' stores the dictionaries as they are. (default)
+                                 'columnar' stores the values per column to reduce the memory. (refer ColumnarList)
+                                 With the columnar storage, returned elements are copies made at the access.
+                                 The changes of a walker are stored again, but the index is not supported.
 
     Methods:
-        dictlist = DictList(key=None)
+        dictlist = DictList(key=None, storage='list')
 
         str(dictlist)
         dictlist.print(print_all=False)
@@ -26,34 +39,116 @@ class DictList:
         element = dictlist.get(queries)    : getting the element what is matched with argument queries
             queries (list): the list of queries
             query (dictionary) : the key 'key', 'value' should be included to find
+                                 the key 'operator' is optional ('==' is default)
+                                 '==', '!=', '<', '<=', '>', '>=' : comparing the value
+                                 'in' : the value is the list of values, 'prefix' : the value is the prefix string
+                                 'range' : the value is (low, high) what means low <= value < high
+            The queries use the indexes and the range of the stored key, and then check the rest of the queries.
 
         list = dictlist.get_list()           : getting the list what is stored
         list = dictlist.get_list(value)      : getting the list what is matched with the stored key and argument value
         list = dictlist.get_list(key, value) : getting the list what is matched with argument key and argument value
         list = dictlist.get_list(queries)    : getting the list what is matched with argument queries
+        iterator = dictlist.iter_query(queries) : iterating the elements what are matched with argument queries lazily
+
+        view = dictlist.view() : getting the lazy view of the list (refer DictListView)
+
+        list = dictlist.get_range(low=None, high=None, inclusive=(True, False)) : getting the list in the key range
+        iterator = dictlist.iter_range(low=None, high=None, inclusive=(True, False)) : iterating the key range lazily
+            low, high : the range of the stored key, None is not limited (ex. low <= key < high)
+            inclusive (tuple) : whether low and high are included
+        element = dictlist.first() : getting the element what has the lowest key
+        element = dictlist.last()  : getting the element what has the highest key
 
         list = values(key, overlap=False, sort=False)
+        list = dictlist.distinct(field) : getting the values of the field without overlap in the order of the list
+        value = dictlist.sum(field), dictlist.mean(field), dictlist.min(field), dictlist.max(field)
+        count = dictlist.count(field) : getting the count value how many elements have the field
+        group = dictlist.group_by(field) : grouping the elements by the field (refer DictListGroup)
+            dictlist = group.agg({'price': ['min', 'max'], 'volume': 'sum'})
+            If numpy is installed, the numeric values are calculated by numpy.
+
+        dictlist.sort() : sorting the stored list by the key (it is called by the reading methods automatically)
+            If the key is set, append and insert put the element at the sorted position by binary search.
+            extend, extend_list and imports add an unsorted tail what is merged at the next reading.
 
         dictlist.append(element)   : appending argument element
         dictlist.insert(element)   : inserting argument element at the first of the stored list
-        dictlist.extend(dictlist)  : extending the list from argument dictlist
-        dictlist.extend_list(list) : extending the list
+        dictlist.extend(dictlist, on_conflict=None)  : extending the list from argument dictlist
+        dictlist.extend_list(list, on_conflict=None) : extending the list
+        dictlist.upsert(element, on_conflict='replace') : appending or replacing the element what has the same key
+            on_conflict (str): None appends all elements, 'replace' or 'skip' handles the element what has the same key
+                               ('replace' and 'skip' need the key)
 
         dictlist.remove(element) : removing argument element if the element is exist in the stored list
         element = dictlist.pop(element) : poping argument element if the element is exist in the stored list
+        list = dictlist.remove_by_key(value) : removing the elements what are matched with the stored key and argument value
         dictlist.clear() : clear the stored list
 
+        dictlist.create_index(field, unique=False) : creating the hash index for the field
+            unique (bool): the values of the field should not be duplicated
+                           adding or replacing an element what has a duplicated value fails (the error is printed),
+                           and creating a unique index fails if the stored elements have a duplicated value
+        dictlist.drop_index(field) : dropping the hash index for the field
+            get(key, value), get(queries), get_list(key, value), get_list(queries) use the index automatically.
+            The index is updated by append, insert, extend, extend_list, remove, pop, clear and imports.
+            If a walker or a caller changes the indexed field of a stored element, call create_index again.
+
         dictlist.import_json(file, encoding='UTF-8-sig') : importing the json data from json file
         dictlist.export_json(file, encoding='UTF-8-sig') : exporting the data what is stored list to csv file
-        dictlist.import_csv(file, encoding='UTF-8-sig', separator=',') : importing the json data from json file
-        dictlist.export_csv(file, encoding='UTF-8-sig') : exporting the data what is stored list to csv file
+        dictlist.import_jsonl(source, encoding='UTF-8-sig', chunk_size=10000) : importing the json lines by chunks
+            source (str or iterable): the file path or the iterable of json lines (or dictionaries)
+        dictlist.export_jsonl(file, encoding='UTF-8-sig', append=False) : exporting the data as json lines
+            append (bool): writing only the elements what are added after the last export of the file with append
+                           the first export with append writes all elements, and then the added elements are kept
+                           until the next export with append (the file is in the append mode)
+                           export without append stops the append mode of the file, clear stops all append modes
+                           remove, pop and replacements are not reflected, export without append to rewrite the file
+        generator = dictlist.iter_jsonl() : generating the json line of the elements
+        dictlist.import_csv(file, encoding='UTF-8-sig', separator=',', converters=None, chunk_size=10000)
+            : importing the csv data from csv file by chunks
+            converters (dict, optional) : the converter of the column what is called once at the loading
+                                          (ex. {'price': float, 'date': datetime.date.fromisoformat})
+        dictlist.export_csv(file, encoding='UTF-8-sig', buffer_size=10000) : exporting the data what is stored list to csv file
+            buffer_size (int) : the number of rows what are written at once
             file (str): the file path (ex. os.path.join(os.getcwd(), 'files', 'data.json'))
 
-        dictlist.import_mongodb(database, collection, range_filter=None) : importing the data from mongodb
-        dictlist.export_mongodb(database, collection) : exporting the datawhat is stored list to mongodb
-
-        walker_handler = dictlist.plug_in_walker(walker, walker_delay=False, insert=False)
+        dictlist.save_snapshot(file) : saving the key, the sort state, the indexes and the data as a binary snapshot
+        dictlist = DictList.load_snapshot(file, mmap=True) : loading the snapshot what is saved by save_snapshot
+            The snapshot is pickle protocol 5 what has out-of-band buffers aligned by 8 bytes.
+            With the columnar storage, the int and float columns are the buffers (refer ColumnarList).
+            With mmap, those columns refer the mapped file without copying, so processes what load the same snapshot
+                share the pages, and a column is copied when the list is changed at first.
+            With the list storage, the dictionaries are unpickled as they are.
+            save_snapshot writes a temporary file and replaces the file, so a mapped snapshot can be saved to its file.
+            load_snapshot checks the lengths in the header, so a truncated snapshot is not loaded.
+
+        dictlist.import_mongodb(database, collection, range_filter=None, batch_size=10000, query=None)
+            : importing the data from mongodb
+            range_filter (optional): the range of theo.database (MongoDB.select) and MongoDBCtrl 'select' interface
+            query (dict, optional): the filter document of find (ex. {'date': {'$gte': '2019-01-01'}})
+                                    it is used only with the configured client
+        dictlist.export_mongodb(database, collection, batch_size=10000) : exporting the datawhat is stored list to mongodb
+            The data is sent by batch_size.
+        The database is selected in the order below.
+            MongoDBCtrl component : the interfaces of MongoDBCtrl are called
+            configured client : the cursor is read by batch_size, the elements are upserted by the key with bulk_write
+                                (or inserted with insert_many without the key)
+            theo.database : MongoDB of theo.database (the default)
+        DictList.configure_mongodb(client=None, host='localhost', port=27017) : setting the shared client
+            client (optional): pymongo.MongoClient or the compatible client (ex. mongomock.MongoClient())
+            Without client, pymongo.MongoClient(host, port) is made. (pip install theo-framework[mongodb])
+
+        walker_handler = dictlist.plug_in_walker(walker, walker_delay=False, insert=False, batch=False)
+            batch (bool): the walker is called with the list of new elements (up to DictList.walker_chunk_size)
+                          instead of being called for each element
+            executor (concurrent.futures.Executor, optional): the walker runs on the executor asynchronously
+                The chunks of a walker are handled in order, but the walkers do not wait each other.
+                If the backlog (the number of waiting chunks) of the walker is full, adding elements waits.
+                With ProcessPoolExecutor or the columnar storage, the changes of elements are not stored.
+            The walkers visit new elements chunk by chunk in the order of the walkers.
         dictlist.plug_out_walker(walker_handler)
+        dictlist.join_walker(walker_handler=None) : waiting until the asynchronous walkers handle all chunks
 
     Example:
         contract_dictlist = DictList(key='name')
@@ -65,23 +160,49 @@ class DictList:
         print(theo_contract) : {'name': 'theo', 'email': 'taehee.won@gmail.com'}
     """
 
-    def __init__(self, key=None):
-        self.data = list()
+    insertion_limit = 64
+
+    def __init__(self, key=None, storage='list'):
+        self.storage = storage if storage in ['list', 'columnar'] else 'list'
+        self.data = ColumnarList() if self.storage == 'columnar' else list()
 
         self.key = key if key is not None and isinstance(key, str) else None
         self.sorted = True
+        self.sorted_count = 0
 
         self.walkers = list()
 
+        self.indexes = dict()
+
+        self.journals = dict()
+
+    def __getstate__(self):
+        # walkers and journals belong to the running program, they are not stored
+        state = self.__dict__.copy()
+        state['walkers'] = list()
+        state['journals'] = dict()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        # the buckets of the indexes are keyed by the identities of the elements, they are changed by unpickling
+        for index in self.indexes.values():
+            if not index['unique']:
+                for value, bucket in index['table'].items():
+                    index['table'][value] = {id(element): element for element in bucket.values()}
+
+                # the order of the buckets is not known in an older snapshot, so they are sorted at the reading
+                if 'unordered' not in index:
+                    index['unordered'] = set(index['table'])
+
     def __str__(self):
         return f'DictList(num:{len(self.data)}/key:{self.key}' \
                + (f')' if not len(self.walkers) else f'/walkers:{len(self.walkers)})')
 
     def print(self, print_all=None):
         try:
-            if self.key is not None and not self.sorted:
-                self.data.sort(key=lambda element: element[self.key])
-                self.sorted = True
+            self.sort()
         except Exception as error:
             print(f'error: {error} / dictlist.print(print_all:{print_all}/{type(print_all)})')
             print(f'\tno value for the key({self.key}) at',
@@ -102,14 +223,15 @@ class DictList:
         except Exception as error:
             print(f'error: {error} / dictlist.print(print_all:{print_all}/{type(print_all)})')
 
-    def count(self):
-        return len(self.data)
+    def count(self, field=None):
+        if field is None:
+            return len(self.data)
+
+        return self.aggregate(field, 'count')
 
     def get(self, attr1, attr2=None):
         try:
-            if self.key and not self.sorted:
-                self.data.sort(key=lambda element: element[self.key])
-                self.sorted = True
+            self.sort()
         except Exception as error:
             print(f'error: {error} / dictlist.get(attr1:{attr1}/{type(attr1)}, attr2:{attr2}/{type(attr2)})')
             print(f'\tno value for the key({self.key}) at',
@@ -122,14 +244,7 @@ class DictList:
                 if not len(attr1):
                     raise
 
-                for element in self.data:
-                    for query in attr1:
-                        if not (query['key'] in element and element[query['key']] == query['value']):
-                            break
-                    else:
-                        return element
-
-                return None
+                return next(self.select(attr1), None)
             except Exception as error:
                 print(f'error: {error} / dictlist.get(queries:{attr1}/{type(attr1)})')
                 print('\telement = dictlist.get(queries) : getting the element what is matched with argument queries')
@@ -160,6 +275,10 @@ class DictList:
         # element = dictlist.get(key, value) : getting the element what is matched with argument key and argument value
         else:
             try:
+                source = self.get_buckets([{'key': attr1, 'value': attr2}])
+                if source is not None:
+                    return next(self.iter_candidates(source[0], source[1]), None)
+
                 for element in self.data:
                     if attr1 in element and element[attr1] == attr2:
                         return element
@@ -172,9 +291,7 @@ class DictList:
 
     def get_list(self, attr1=None, attr2=None):
         try:
-            if self.key and not self.sorted:
-                self.data.sort(key=lambda element: element[self.key])
-                self.sorted = True
+            self.sort()
         except Exception as error:
             print(f'error: {error} / dictlist.get_list(attr1:{attr1}/{type(attr1)}, attr2:{attr2}/{type(attr2)})')
             print(f'\tno value for the key({self.key}) at',
@@ -191,15 +308,7 @@ class DictList:
                 if not len(attr1):
                     raise
 
-                data = list()
-                for element in self.data:
-                    for query in attr1:
-                        if not (query['key'] in element and element[query['key']] == query['value']):
-                            break
-                    else:
-                        data.append(element)
-
-                return data
+                return list(self.select(attr1))
             except Exception as error:
                 print(f'error: {error} / dictlist.get_list(queries:{attr1}/{type(attr1)})')
                 print('\tlist = dictlist.get_list(queries) : getting the list what is matched with argument queries')
@@ -208,6 +317,9 @@ class DictList:
         # list = dictlist.get_list(value) : getting the list what is matched with the stored key and argument value
         elif not attr2:
             try:
+                if self.key is not None:
+                    return self.data[self.search(attr1):self.search(attr1, right=True)]
+
                 return list(filter(lambda element: element[self.key] == attr1, self.data))
             except Exception as error:
                 print(f'error: {error} / dictlist.get_list(value:{attr1}/{type(attr1)})')
@@ -218,6 +330,10 @@ class DictList:
         # list = dictlist.get_list(key, value) : getting the list what is matched with argument key and argument value
         else:
             try:
+                source = self.get_buckets([{'key': attr1, 'value': attr2}])
+                if source is not None:
+                    return list(self.iter_candidates(source[0], source[1]))
+
                 return list(filter(lambda element: element[attr1] == attr2, self.data))
             except Exception as error:
                 print(f'error: {error} / dictlist.get_list(key:{attr1}/{type(attr1)}, value:{attr2}/{type(attr2)})')
@@ -225,11 +341,59 @@ class DictList:
                       'getting the list what is matched with argument key and argument value')
                 return None
 
+    def view(self):
+        from theo.src.framework.DictListView import DictListView
+        return DictListView(self)
+
+    def get_range(self, low=None, high=None, inclusive=(True, False)):
+        try:
+            self.sort()
+
+            start, end = self.get_range_position(low, high, inclusive)
+            return self.data[start:end]
+        except Exception as error:
+            print(f'error: {error} / dictlist.get_range(low:{low}/{type(low)}, high:{high}/{type(high)},',
+                  f'inclusive:{inclusive}/{type(inclusive)})')
+            return None
+
+    def iter_range(self, low=None, high=None, inclusive=(True, False)):
+        try:
+            self.sort()
+
+            start, end = self.get_range_position(low, high, inclusive)
+            for index in range(start, end):
+                yield self.data[index]
+        except Exception as error:
+            print(f'error: {error} / dictlist.iter_range(low:{low}/{type(low)}, high:{high}/{type(high)},',
+                  f'inclusive:{inclusive}/{type(inclusive)})')
+
+    def get_range_position(self, low, high, inclusive):
+        if self.key is None:
+            raise Exception('the key is needed for a range')
+
+        start = 0 if low is None else self.search(low, right=not inclusive[0])
+        end = len(self.data) if high is None else self.search(high, right=inclusive[1])
+        return start, max(start, end)
+
+    def first(self):
+        try:
+            self.sort()
+            return self.data[0] if len(self.data) else None
+        except Exception as error:
+            print(f'error: {error} / dictlist.first()')
+            return None
+
+    def last(self):
+        try:
+            self.sort()
+            return self.data[-1] if len(self.data) else None
+        except Exception as error:
+            print(f'error: {error} / dictlist.last()')
+            return None
+
     def values(self, key, overlap=False, sort=False):
         try:
-            if self.key and not self.sorted:
-                self.data.sort(key=lambda element: element[self.key])
-                self.sorted = True
+            self.sort()
         except Exception as error:
             print(f'error: {error} / dictlist.values(key:{key}/{type(key)})')
             print(f'\tno value for the key({self.key}) at',
@@ -237,7 +401,7 @@ class DictList:
             return None
 
         try:
-            values = list(map(lambda element: element[key], filter(lambda element: key in element, self.data)))
+            values = self.get_column(key)
             if not overlap: values = list(set(values))
             if sort:        values.sort()
             return values
@@ -246,64 +410,586 @@ class DictList:
                   f'overlap:{overlap}/{type(overlap)}, sort:{sort}/{type(sort)})')
             return None
 
-    def append(self, element):
+    def get_column(self, field):
+        if self.storage == 'columnar':
+            return self.data.column(field)
+
+        return list(map(lambda element: element[field], filter(lambda element: field in element, self.data)))
+
+    def distinct(self, field):
+        try:
+            self.sort()
+            return list(dict.fromkeys(self.get_column(field)))
+        except Exception as error:
+            print(f'error: {error} / dictlist.distinct(field:{field}/{type(field)})')
+            return None
+
+    def sum(self, field):
+        return self.aggregate(field, 'sum')
+
+    def mean(self, field):
+        return self.aggregate(field, 'mean')
+
+    def min(self, field):
+        return self.aggregate(field, 'min')
+
+    def max(self, field):
+        return self.aggregate(field, 'max')
+
+    def aggregate(self, field, function):
+        try:
+            self.sort()
+            return DictList.calculate(self.get_column(field), function)
+        except Exception as error:
+            print(f'error: {error} / dictlist.aggregate(field:{field}/{type(field)}, function:{function}/{type(function)})')
+            return None
+
+    def group_by(self, field):
+        try:
+            self.sort()
+            return DictListGroup(self, field)
+        except Exception as error:
+            print(f'error: {error} / dictlist.group_by(field:{field}/{type(field)})')
+            return None
+
+    aggregate_functions = ['sum', 'mean', 'min', 'max', 'count']
+
+    @staticmethod
+    def calculate(values, function):
+        if function not in DictList.aggregate_functions:
+            raise Exception(f'unknown function({function})')
+
+        if function == 'count':
+            return len(values)
+        elif not len(values):
+            return None
+
+        array = DictList.get_numeric_array(values)
+        if array is not None and not (function in ['sum', 'mean'] and DictList.is_overflowed(array)):
+            if function == 'mean' and array.dtype.kind != 'f':
+                # the integer sum is divided as python int, the same as the result without numpy
+                return array.sum().item() / len(values)
+
+            return getattr(array, function)().item()
+
+        if function == 'sum':
+            return sum(values)
+        elif function == 'mean':
+            return sum(values) / len(values)
+        elif function == 'min':
+            return min(values)
+        else:
+            return max(values)
+
+    @staticmethod
+    def get_numeric_array(values):
+        # numpy is optional, the numeric values are calculated by numpy if it is installed
+        try:
+            import numpy
+        except ImportError:
+            return None
+
         try:
+            array = numpy.asarray(values)
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+        return array if array.ndim == 1 and array.dtype.kind in 'biuf' else None
+
+    @staticmethod
+    def is_overflowed(array):
+        # whether the int64 sum of the integer values can overflow, then the values are calculated as python int
+        if array.dtype.kind == 'f' or not len(array):
+            return False
+
+        return max(int(array.max()), -int(array.min())) * len(array) >= 2 ** 63
+
+    def sort(self):
+        if self.key is None or self.sorted:
+            return
+
+        if len(self.data) - self.sorted_count <= DictList.insertion_limit:
+            # a small unsorted tail is merged into the sorted run by binary insertion
+            tail = self.data[self.sorted_count:]
+            del self.data[self.sorted_count:]
+            for position, element in enumerate(tail):
+                try:
+                    self.data.insert(self.search(element[self.key], right=True), element)
+                    self.sorted_count = self.sorted_count + 1
+                except Exception:
+                    self.data.extend(tail[position:])
+                    raise
+        else:
+            # timsort merges the sorted run and the unsorted tail
+            self.data.sort(key=operator.itemgetter(self.key))
+
+        self.sorted = True
+        self.sorted_count = len(self.data)
+
+    def search(self, value, right=False):
+        # returns the insertion position of the value in the sorted run (left or right of the same values)
+        left_index, right_index = 0, self.sorted_count
+        while left_index < right_index:
+            index = (left_index + right_index) // 2
+            if self.data[index][self.key] < value or (right and self.data[index][self.key] == value):
+                left_index = index + 1
+            else:
+                right_index = index
+
+        return left_index
+
+    def add(self, element, insert=False):
+        if insert and self.key is not None and not self.sorted and self.key in element:
+            # the tail is sorted first, so the inserted element is placed before the same keys of the tail
+            self.sort()
+
+        if self.key is not None and self.sorted and self.key in element:
+            # an inserted element goes before the same keys and an appended element goes after them
+            self.data.insert(self.search(element[self.key], right=not insert), element)
+            self.sorted_count = len(self.data)
+        elif insert and self.key is None:
+            self.data.insert(0, element)
+        else:
             self.data.append(element)
             self.sorted = False
 
+        for journal in self.journals.values():
+            journal.append(element)
+
+    def append(self, element):
+        try:
+            self.check_unique([element])
+            self.add(element)
+
             self.run_walker()
+            self.index_elements([element])
         except Exception as error:
             print(f'error: {error} / dictlist.append(element:{element}/{type(element)})')
 
     def insert(self, element):
         try:
-            self.data.insert(0, element)
-            self.sorted = False
+            self.check_unique([element])
+            self.add(element, insert=True)
 
             self.run_walker()
+            self.index_elements([element], insert=True)
         except Exception as error:
             print(f'error: {error} / dictlist.insert(element:{element}/{type(element)})')
 
-    def extend(self, dictlist):
+    def extend(self, dictlist, on_conflict=None):
         try:
             if dictlist.count():
-                self.data.extend(dictlist.get_list())
-                self.sorted = False
-
-                self.run_walker()
+                if on_conflict is None:
+                    self.add_list(dictlist.get_list())
+                else:
+                    self.merge(dictlist.get_list(), on_conflict)
         except Exception as error:
-            print(f'error: {error} / dictlist.extend(dictlist:{dictlist}/{type(dictlist)})')
+            print(f'error: {error} / dictlist.extend(dictlist:{dictlist}/{type(dictlist)},',
+                  f'on_conflict:{on_conflict}/{type(on_conflict)})')
 
-    def extend_list(self, data):
+    def extend_list(self, data, on_conflict=None):
         try:
             if len(data):
-                self.data.extend(data)
-                self.sorted = False
+                if on_conflict is None:
+                    self.add_list(data)
+                else:
+                    self.merge(data, on_conflict)
+        except Exception as error:
+            print(f'error: {error} / dictlist.extend_list(list:{data}/{type(data)},',
+                  f'on_conflict:{on_conflict}/{type(on_conflict)})')
 
-                self.run_walker()
+    def upsert(self, element, on_conflict='replace'):
+        try:
+            self.merge([element], on_conflict)
         except Exception as error:
-            print(f'error: {error} / dictlist.extend_list(list:{data}/{type(data)})')
+            print(f'error: {error} / dictlist.upsert(element:{element}/{type(element)},',
+                  f'on_conflict:{on_conflict}/{type(on_conflict)})')
+
+    def add_list(self, data):
+        self.check_unique(data)
+
+        self.data.extend(data)
+        self.sorted = False
+
+        for journal in self.journals.values():
+            journal.extend(data)
+
+        self.run_walker()
+        self.index_elements(data)
+
+    def merge(self, data, on_conflict):
+        if on_conflict not in ['replace', 'skip']:
+            raise Exception(f'unknown on_conflict({on_conflict})')
+        if self.key is None:
+            raise Exception('the key is needed to find a conflict')
+
+        self.sort()
+
+        replacements = dict()
+        new_elements = dict()
+        for element in data:
+            value = element[self.key]
+            position = self.search(value)
+            if position < len(self.data) and self.data[position][self.key] == value:
+                if on_conflict == 'replace':
+                    replacements[position] = element
+            elif on_conflict == 'replace' or value not in new_elements:
+                new_elements[value] = element
+
+        self.check_unique(list(replacements.values()) + list(new_elements.values()),
+                          replaced=list(map(self.data.__getitem__, replacements)))
+
+        for position, element in replacements.items():
+            self.replace(position, element)
+
+        if len(new_elements) <= DictList.insertion_limit:
+            for element in new_elements.values():
+                self.add(element)
+            self.run_walker()
+            self.index_elements(list(new_elements.values()))
+        else:
+            self.add_list(list(new_elements.values()))
+
+    def replace(self, position, element):
+        stored_element = self.data[position]
+        self.data[position] = element
+
+        self.unindex_element(stored_element)
+        self.index_elements([element])
 
     def remove(self, element):
         try:
-            self.data.remove(element)
+            position = self.find(element)
+            stored_element = self.data[position]
+
+            self.delete(position)
+            self.unindex_element(stored_element)
         except Exception as error:
             print(f'error: {error} / dictlist.remove(element:{element}/{type(element)})')
 
     def pop(self, element):
         try:
-            if element in self.data:
-                self.data.remove(element)
-                return element
+            try:
+                position = self.find(element)
+            except ValueError:
+                return None
 
-            return None
+            stored_element = self.data[position]
+
+            self.delete(position)
+            self.unindex_element(stored_element)
+            return element
         except Exception as error:
             print(f'error: {error} / dictlist.remove(element:{element}/{type(element)})')
             return None
 
+    def remove_by_key(self, value):
+        try:
+            if self.key is None:
+                raise Exception('the key is needed to remove by the key')
+
+            self.sort()
+
+            start, end = self.search(value), self.search(value, right=True)
+            elements = self.data[start:end]
+            del self.data[start:end]
+            self.sorted_count = self.sorted_count - len(elements)
+
+            for element in elements:
+                self.unindex_element(element)
+
+            return elements
+        except Exception as error:
+            print(f'error: {error} / dictlist.remove_by_key(value:{value}/{type(value)})')
+            return None
+
+    def find(self, element):
+        # the position of the element is found by binary search if the element has the key
+        if self.key is not None and self.key in element:
+            self.sort()
+
+            start, end = self.search(element[self.key]), self.search(element[self.key], right=True)
+            for position in range(start, end):
+                if self.data[position] is element:
+                    return position
+            for position in range(start, end):
+                if self.data[position] == element:
+                    return position
+
+            raise ValueError('the element is not in DictList')
+
+        return self.data.index(element)
+
+    def delete(self, index):
+        del self.data[index]
+        if index < self.sorted_count:
+            self.sorted_count = self.sorted_count - 1
+
     def clear(self):
         self.data.clear()
         self.sorted = True
+        self.sorted_count = 0
+
+        for index in self.indexes.values():
+            index['table'].clear()
+            index['unordered'].clear()
+
+        # the files still have the cleared elements, so the next export with append rewrites the files
+        self.journals.clear()
+
+    def create_index(self, field, unique=False):
+        try:
+            if self.storage == 'columnar':
+                raise Exception('the index is not supported with the columnar storage')
+
+            self.indexes[field] = {'unique': unique, 'table': dict(), 'unordered': set()}
+            if unique:
+                self.check_unique(self.data, fields=[field], is_stored=False)
+            self.index_elements(self.data, fields=[field])
+        except Exception as error:
+            print(f'error: {error} / dictlist.create_index(field:{field}/{type(field)}, unique:{unique}/{type(unique)})')
+            self.indexes.pop(field, None)
+
+    def drop_index(self, field):
+        try:
+            self.indexes.pop(field)
+        except Exception as error:
+            print(f'error: {error} / dictlist.drop_index(field:{field}/{type(field)})')
+
+    def index_elements(self, elements, insert=False, fields=None):
+        for field in self.indexes if fields is None else fields:
+            index = self.indexes[field]
+            table = index['table']
+            for element in elements:
+                if field not in element:
+                    continue
+
+                try:
+                    value = element[field]
+                    if index['unique']:
+                        table[value] = element
+                    elif value in table:
+                        # the bucket is keyed by the identity of the element in the order of the list
+                        bucket = table[value]
+                        if insert:
+                            self.check_order(index, value, element, next(iter(bucket.values())))
+                            table[value] = {id(element): element, **bucket}
+                        else:
+                            self.check_order(index, value, next(reversed(bucket.values())), element)
+                            bucket[id(element)] = element
+                    else:
+                        table[value] = {id(element): element}
+                except TypeError:
+                    # an unhashable value can not be matched with a hashable query value
+                    continue
+
+    def check_unique(self, elements, replaced=(), fields=None, is_stored=True):
+        # raises when the elements have a value what is duplicated in a unique index, before the elements are added
+        # replaced : the stored elements what are replaced by the elements, their values can be used again
+        # is_stored : whether the values of the stored elements are checked (False when the index is being created)
+        replaced = set(map(id, replaced))
+        for field in self.indexes if fields is None else fields:
+            index = self.indexes[field]
+            if not index['unique']:
+                continue
+
+            values = set()
+            for element in elements:
+                if field not in element:
+                    continue
+
+                try:
+                    value = element[field]
+                    stored_element = index['table'].get(value) if is_stored else None
+                    if value in values or (stored_element is not None and id(stored_element) not in replaced):
+                        raise Exception(f'the value({value}) of the unique index({field}) is duplicated')
+                    values.add(value)
+                except TypeError:
+                    continue
+
+    def unindex_element(self, element):
+        for field, index in self.indexes.items():
+            try:
+                if field in element and element[field] in index['table']:
+                    if index['unique']:
+                        # the value may be taken by another element already (ex. the replacements swap the values)
+                        if index['table'][element[field]] is element:
+                            del index['table'][element[field]]
+                    else:
+                        bucket = index['table'][element[field]]
+                        bucket.pop(id(element), None)
+                        if not len(bucket):
+                            del index['table'][element[field]]
+                            index['unordered'].discard(element[field])
+            except (TypeError, ValueError):
+                continue
+
+    def check_order(self, index, value, first, second):
+        # a bucket follows the order of the list, a bucket what is out of the order of the key is sorted at the reading
+        if self.key is None or value in index['unordered']:
+            return
+
+        try:
+            if first[self.key] <= second[self.key]:
+                return
+        except (KeyError, TypeError):
+            pass
+
+        index['unordered'].add(value)
+
+    def get_bucket(self, index, value):
+        bucket = index['table'][value]
+        if value in index['unordered']:
+            # the sorted bucket is kept, so it is sorted once until it is out of the order again
+            bucket = dict(sorted(bucket.items(), key=lambda item: item[1][self.key]))
+            index['table'][value] = bucket
+            index['unordered'].discard(value)
+
+        return bucket.values()
+
+    def get_buckets(self, queries):
+        # returns (index, values, size) of the smallest indexed buckets what can match the queries,
+        # None if no index is usable, the elements are not gathered until the buckets are chosen
+        source = None
+        for query in queries:
+            index = self.indexes.get(query['key'])
+            operator_name = query.get('operator', '==')
+            if index is None or operator_name not in ['==', 'in']:
+                continue
+
+            # the buckets of several values do not keep the order of the list without the key
+            if operator_name == 'in' and self.key is None:
+                continue
+
+            try:
+                # a duplicated value of 'in' gathers the bucket once
+                table = index['table']
+                values = [value for value in ([query['value']] if operator_name == '==' else dict.fromkeys(query['value']))
+                          if value in table]
+            except TypeError:
+                continue
+
+            size = len(values) if index['unique'] else sum(map(lambda value: len(table[value]), values))
+            if source is None or size < source[2]:
+                source = (index, values, size)
+
+        return source
+
+    def iter_candidates(self, index, values):
+        # iterating the elements of the buckets in the order of the list
+        if index['unique']:
+            elements = list(map(index['table'].__getitem__, values))
+            if self.key is not None and len(elements) > 1:
+                elements.sort(key=operator.itemgetter(self.key))
+            return iter(elements)
+
+        buckets = list(map(lambda value: self.get_bucket(index, value), values))
+        if len(buckets) == 1:
+            return iter(buckets[0])
+
+        return heapq.merge(*buckets, key=operator.itemgetter(self.key))
+
+    query_operators = {
+        '==': operator.eq,
+        '!=': operator.ne,
+        '<': operator.lt,
+        '<=': operator.le,
+        '>': operator.gt,
+        '>=': operator.ge,
+        'in': lambda value, values: value in values,
+        'prefix': lambda value, prefix: isinstance(value, str) and value.startswith(prefix),
+        'range': lambda value, bounds: bounds[0] <= value < bounds[1],
+    }
+
+    # the predicates what are likely to drop more elements are checked first
+    query_priorities = {'==': 0, 'in': 1, 'prefix': 2, 'range': 3, '<': 4, '<=': 4, '>': 4, '>=': 4, '!=': 5}
+
+    def iter_query(self, queries):
+        try:
+            self.sort()
+
+            for element in self.select(queries):
+                yield element
+        except Exception as error:
+            print(f'error: {error} / dictlist.iter_query(queries:{queries}/{type(queries)})')
+
+    def select(self, queries):
+        predicates = DictList.get_predicates(queries)
+
+        for element in self.plan_query(queries):
+            if DictList.match(element, predicates):
+                yield element
+
+    @staticmethod
+    def get_predicates(queries):
+        if not len(queries):
+            raise Exception('no query')
+
+        predicates = list()
+        for query in queries:
+            operator_name = query.get('operator', '==')
+            if operator_name not in DictList.query_operators:
+                raise Exception(f'unknown operator({operator_name})')
+
+            predicates.append((DictList.query_priorities[operator_name], query['key'],
+                               DictList.query_operators[operator_name], query['value']))
+        predicates.sort(key=operator.itemgetter(0))
+
+        return predicates
+
+    @staticmethod
+    def match(element, predicates):
+        for _, key, compare, value in predicates:
+            if not (key in element and compare(element[key], value)):
+                return False
+
+        return True
+
+    def plan_query(self, queries):
+        # choosing the smallest source among the indexed buckets, the range of the sorted key and the whole list
+        # the sizes are compared first, so the elements of the buckets are gathered only when the buckets are chosen
+        source = self.get_buckets(queries)
+
+        if self.key is not None:
+            start, end, is_limited = 0, len(self.data), False
+            for query in queries:
+                if query['key'] == self.key:
+                    position = self.get_query_position(query.get('operator', '=='), query['value'])
+                    if position is not None:
+                        start, end, is_limited = max(start, position[0]), min(end, position[1]), True
+
+            if is_limited and (source is None or end - start < source[2]):
+                return map(self.data.__getitem__, range(start, max(start, end)))
+
+        return self.data if source is None else self.iter_candidates(source[0], source[1])
+
+    def get_query_position(self, operator_name, value):
+        # a value what can not be compared with the keys is scanned
+        try:
+            return self.search_query_position(operator_name, value)
+        except TypeError:
+            return None
+
+    def search_query_position(self, operator_name, value):
+        if operator_name == '==':
+            return self.search(value), self.search(value, right=True)
+        elif operator_name == '<':
+            return 0, self.search(value)
+        elif operator_name == '<=':
+            return 0, self.search(value, right=True)
+        elif operator_name == '>':
+            return self.search(value, right=True), len(self.data)
+        elif operator_name == '>=':
+            return self.search(value), len(self.data)
+        elif operator_name == 'range':
+            return self.search(value[0]), self.search(value[1])
+        elif operator_name == 'prefix' and isinstance(value, str) and len(value) and ord(value[-1]) < 0x10ffff \
+                and self.sorted_count and isinstance(self.data[0][self.key], str) \
+                and isinstance(self.data[self.sorted_count - 1][self.key], str):
+            # the range of a prefix is searched only in the string keys, the other keys are scanned
+            return self.search(value), self.search(value[:-1] + chr(ord(value[-1]) + 1))
+
+        return None
 
     def import_json(self, file, encoding='UTF-8-sig'):
         try:
@@ -313,19 +999,14 @@ class DictList:
                 file_handler.close()
 
                 if len(data):
-                    self.data.extend(data)
-                    self.sorted = False
-
-                    self.run_walker()
+                    self.add_list(data)
         except Exception as error:
             print(f'error: {error} / dictlist.import_json(file:{file}/{type(file)},',
                   f'encoding:{encoding}/{type(encoding)})')
 
     def export_json(self, file, encoding='UTF-8-sig'):
         try:
-            if self.key and not self.sorted:
-                self.data.sort(key=lambda element: element[self.key])
-                self.sorted = True
+            self.sort()
         except Exception as error:
             print(f'error: {error} / dictlist.import_json(file:{file}/{type(file)}, encoding:{encoding}/{type(encoding)})')
             print(f'\tno value for the key({self.key}) at',
@@ -338,45 +1019,222 @@ class DictList:
                     os.makedirs(os.path.dirname(os.path.abspath(file)))
 
                 file_handler = open(file, 'w', encoding=encoding)
-                json.dump(self.data, file_handler, ensure_ascii=False, indent="\t")
+                json.dump(list(self.data) if self.storage == 'columnar' else self.data,
+                          file_handler, ensure_ascii=False, indent="\t")
                 file_handler.close()
         except Exception as error:
             print(f'error: {error} / dictlist.import_json(file:{file}/{type(file)},',
                   'encoding:{encoding}/{type(encoding)})')
 
-    def import_csv(self, file, encoding='UTF-8-sig', separator=','):
+    def import_jsonl(self, source, encoding='UTF-8-sig', chunk_size=10000):
+        try:
+            if isinstance(source, str):
+                if not os.path.exists(source):
+                    return
+
+                file_handler = open(source, 'r', encoding=encoding)
+                lines = file_handler
+            else:
+                file_handler = None
+                lines = source
+
+            data = list()
+            for line in lines:
+                if isinstance(line, dict):
+                    data.append(line)
+                elif line.strip():
+                    data.append(json.loads(line))
+
+                if len(data) >= chunk_size:
+                    self.add_list(data)
+                    data = list()
+
+            if len(data):
+                self.add_list(data)
+
+            if file_handler is not None:
+                file_handler.close()
+        except Exception as error:
+            print(f'error: {error} / dictlist.import_jsonl(source:{source}/{type(source)},',
+                  f'encoding:{encoding}/{type(encoding)}, chunk_size:{chunk_size}/{type(chunk_size)})')
+
+    def iter_jsonl(self):
+        try:
+            self.sort()
+
+            for element in self.data:
+                yield json.dumps(element, ensure_ascii=False) + '\n'
+        except Exception as error:
+            print(f'error: {error} / dictlist.iter_jsonl()')
+
+    def export_jsonl(self, file, encoding='UTF-8-sig', append=False):
+        try:
+            if not os.path.exists(os.path.dirname(os.path.abspath(file))):
+                os.makedirs(os.path.dirname(os.path.abspath(file)))
+
+            journal = self.journals.get(os.path.abspath(file))
+            if append and journal is not None:
+                if len(journal):
+                    file_handler = open(file, 'a', encoding=encoding)
+                    file_handler.writelines(map(lambda element: json.dumps(element, ensure_ascii=False) + '\n', journal))
+                    file_handler.close()
+            else:
+                file_handler = open(file, 'w', encoding=encoding)
+                file_handler.writelines(self.iter_jsonl())
+                file_handler.close()
+
+            # only the files in the append mode keep the journal of the added elements
+            if append:
+                self.journals[os.path.abspath(file)] = list()
+            else:
+                self.journals.pop(os.path.abspath(file), None)
+        except Exception as error:
+            print(f'error: {error} / dictlist.export_jsonl(file:{file}/{type(file)},',
+                  f'encoding:{encoding}/{type(encoding)}, append:{append}/{type(append)})')
+
+    snapshot_magic = b'THEODL02'
+
+    def save_snapshot(self, file):
+        try:
+            if not os.path.exists(os.path.dirname(os.path.abspath(file))):
+                os.makedirs(os.path.dirname(os.path.abspath(file)))
+
+            # the snapshot is written into a temporary file and replaces the file at the end,
+            # because the loaded columns of a mapped snapshot may still refer the file
+            temporary_file = f'{file}.{os.getpid()}.{threading.get_ident()}.tmp'
+            try:
+                with open(temporary_file, 'wb') as file_handler:
+                    file_handler.writelines(self.dump_snapshot())
+                os.replace(temporary_file, file)
+            except BaseException:
+                os.remove(temporary_file)
+                raise
+        except Exception as error:
+            print(f'error: {error} / dictlist.save_snapshot(file:{file}/{type(file)})')
+
+    @staticmethod
+    def load_snapshot(file, mmap=True):
+        try:
+            file_handler = open(file, 'rb')
+            if mmap:
+                content = memoryview(memory_map.mmap(file_handler.fileno(), 0, access=memory_map.ACCESS_READ))
+            else:
+                content = memoryview(file_handler.read())
+            file_handler.close()
+
+            return DictList.read_snapshot(content)
+        except Exception as error:
+            print(f'error: {error} / DictList.load_snapshot(file:{file}/{type(file)}, mmap:{mmap}/{type(mmap)})')
+            return None
+
+    def dump_snapshot(self, columnar=False):
+        # returns the chunks of a snapshot
+        # magic, flags, the number of buffers, the length of pickle, the lengths of buffers, pickle, buffers (aligned by 8)
+        # columnar : the dictionaries of the list storage are stored by columns,
+        #            and the list and the indexes are made again at the reading (flags 1)
+        self.sort()
+
+        dictlist, flags = self, 0
+        if columnar and self.storage == 'list':
+            dictlist = copy.copy(self)
+            dictlist.data = ColumnarList(self.data)
+            dictlist.indexes = {field: {'unique': index['unique'], 'table': dict(), 'unordered': set()}
+                                for field, index in self.indexes.items()}
+            flags = 1
+
+        buffers = list()
+        data = pickle.dumps(dictlist, protocol=5, buffer_callback=buffers.append)
+        buffers = list(map(lambda buffer: buffer.raw(), buffers))
+
+        chunks = [DictList.snapshot_magic,
+                  struct.pack(f'<{3 + len(buffers)}Q', flags, len(buffers), len(data),
+                              *map(lambda buffer: buffer.nbytes, buffers)),
+                  data]
+        position = sum(map(len, chunks))
+        for buffer in buffers:
+            padding = -position % 8
+            chunks.append(bytes(padding))
+            chunks.append(buffer)
+            position = position + padding + buffer.nbytes
+
+        return chunks
+
+    @staticmethod
+    def read_snapshot(content):
+        # content (memoryview) : the snapshot what is made by dump_snapshot, the buffers refer the content without copying
+        if content[:8] != DictList.snapshot_magic:
+            raise Exception('the file is not a snapshot of DictList')
+
+        if len(content) < 32:
+            raise Exception('the snapshot is truncated')
+
+        flags, buffer_count, data_length = struct.unpack_from('<3Q', content, 8)
+        if len(content) < 32 + 8 * buffer_count:
+            raise Exception('the snapshot is truncated')
+        buffer_lengths = struct.unpack_from(f'<{buffer_count}Q', content, 32)
+
+        position = 32 + 8 * buffer_count
+        data = content[position:position + data_length]
+        position = position + data_length
+
+        buffers = list()
+        for buffer_length in buffer_lengths:
+            position = position + (-position % 8)
+            buffers.append(content[position:position + buffer_length])
+            position = position + buffer_length
+
+        # the lengths of the header are checked, so a truncated snapshot fails at the loading instead of the access
+        if position > len(content):
+            raise Exception('the snapshot is truncated')
+
+        dictlist = pickle.loads(data, buffers=buffers)
+        if not isinstance(dictlist, DictList):
+            raise Exception('the file is not a snapshot of DictList')
+
+        if flags & 1:
+            dictlist.data = list(dictlist.data)
+            dictlist.storage = 'list'
+            dictlist.index_elements(dictlist.data)
+
+        return dictlist
+
+    def import_csv(self, file, encoding='UTF-8-sig', separator=',', converters=None, chunk_size=10000):
         try:
             if os.path.exists(file):
-                file_handler = open(file, 'r', encoding=encoding)
+                file_handler = open(file, 'r', encoding=encoding, newline='')
                 csv_reader = csv.reader(file_handler, delimiter=separator)
-                data = list()
-                for index, values in enumerate(csv_reader):
-                    if index == 0:
-                        keys = list(map(lambda value: value, values))
+
+                keys = next(csv_reader, None)
+                if keys is not None:
+                    if converters:
+                        key_converters = list(map(lambda key: converters.get(key), keys))
+                        make_element = lambda values: {
+                            key: (converter(value) if converter else value)
+                            for key, value, converter in zip(keys, values, key_converters) if value}
                     else:
-                        element = dict()
-                        for key_index, key in enumerate(keys):
-                            if values[key_index]:
-                                element[key] = values[key_index]
+                        value_getter = operator.itemgetter(1)
+                        make_element = lambda values: dict(filter(value_getter, zip(keys, values)))
 
-                        data.append(element)
+                    data = list()
+                    for values in csv_reader:
+                        data.append(make_element(values))
 
-                file_handler.close()
+                        if len(data) >= chunk_size:
+                            self.add_list(data)
+                            data = list()
 
-                if len(data):
-                    self.data.extend(data)
-                    self.sorted = False
+                    if len(data):
+                        self.add_list(data)
 
-                    self.run_walker()
+                file_handler.close()
         except Exception as error:
             print(f'error: {error} / dictlist.import_csv(file:{file}/{type(file)},',
-                  f'encoding:{encoding}/{type(encoding)})')
+                  f'encoding:{encoding}/{type(encoding)}, separator:{separator}/{type(separator)},')
+            print(f'\tconverters:{converters}/{type(converters)}, chunk_size:{chunk_size}/{type(chunk_size)})')
 
-    def export_csv(self, file, encoding='UTF-8-sig'):
+    def export_csv(self, file, encoding='UTF-8-sig', buffer_size=10000):
         try:
-            if self.key and not self.sorted:
-                self.data.sort(key=lambda element: element[self.key])
-                self.sorted = True
+            self.sort()
         except Exception as error:
             print(f'error: {error} / dictlist.export_csv(file:{file}/{type(file)}, encoding:{encoding}/{type(encoding)})')
             print(f'\tno value for the key({self.key}) at'
@@ -392,76 +1250,145 @@ class DictList:
                 keys = list(self.data[0].keys())
                 csv_writer = csv.writer(file_handler)
                 csv_writer.writerow(keys)
-                for element in self.data:
-                    csv_writer.writerow(list(map(lambda key: str(element.get(key)) if key in element else '', keys)))
+                for index in range(0, len(self.data), buffer_size):
+                    csv_writer.writerows([[element.get(key, '') for key in keys]
+                                          for element in self.data[index:index + buffer_size]])
 
                 file_handler.close()
         except Exception as error:
             print(f'error: {error} / dictlist.export_csv(file:{file}/{type(file)},',
-                  f'encoding:{encoding}/{type(encoding)})')
+                  f'encoding:{encoding}/{type(encoding)}, buffer_size:{buffer_size}/{type(buffer_size)})')
+
+    mongodb_client = None
 
-    def import_mongodb(self, database, collection, range_filter=None):
+    @staticmethod
+    def configure_mongodb(client=None, host='localhost', port=27017):
+        try:
+            if client is None:
+                import pymongo
+                client = pymongo.MongoClient(host, port)
+
+            DictList.mongodb_client = client
+        except Exception as error:
+            print(f'error: {error} / DictList.configure_mongodb(client:{client}/{type(client)},',
+                  f'host:{host}/{type(host)}, port:{port}/{type(port)})')
+
+    @staticmethod
+    def get_mongodb_client():
+        # the configured client has a connection pool, so it is shared by all DictLists
+        return DictList.mongodb_client
+
+    def import_mongodb(self, database, collection, range_filter=None, batch_size=10000, query=None):
         try:
             from theo.src.framework.System import System
-            from theo.database import MongoDB
 
-            if 'MongoDBCtrl' in System.get_components():
-                data = System.execute_interface(
-                    'MongoDBCtrl', 'select', database, collection, self.key, None, range_filter)
+            is_controlled = 'MongoDBCtrl' in System.get_components()
+            client = None if is_controlled else DictList.get_mongodb_client()
+
+            # range_filter is the format of theo.database and query is the format of find, they are not converted
+            if client is None and query is not None:
+                raise Exception('query is used with the configured client (DictList.configure_mongodb)')
+            if client is not None and range_filter is not None:
+                raise Exception('range_filter is the range of theo.database, use query with the configured client')
+
+            if client is None:
+                if is_controlled:
+                    data = System.execute_interface(
+                        'MongoDBCtrl', 'select', database, collection, self.key, None, range_filter)
+                else:
+                    from theo.database import MongoDB
+
+                    mongodb = MongoDB()
+                    data = mongodb.select(database, collection, sorting_key=self.key, range=range_filter)
+                    del mongodb
+
+                for index in range(0, len(data) if data else 0, batch_size):
+                    self.add_list(data[index:index + batch_size])
             else:
-                mongodb = MongoDB()
-                data = mongodb.select(database, collection, sorting_key=self.key, range=range_filter)
-                del mongodb
+                cursor = client[database][collection].find(
+                    query if query else {}, {'_id': False}, batch_size=batch_size)
+                if self.key is not None:
+                    cursor = cursor.sort(self.key, 1)
 
-            if len(data):
-                self.data.extend(data)
-                self.sorted = False
-                self.run_walker()
+                data = list()
+                for element in cursor:
+                    data.append(element)
+
+                    if len(data) >= batch_size:
+                        self.add_list(data)
+                        data = list()
+
+                if len(data):
+                    self.add_list(data)
         except Exception as error:
             print(f'error: {error} / dictlist.import_mongodb(database:{database}/{type(database)},',
-                  f'collection:{collection}/{type(collection)}, range:{range}/{type(range)})')
+                  f'collection:{collection}/{type(collection)}, range_filter:{range_filter}/{type(range_filter)},',
+                  f'batch_size:{batch_size}/{type(batch_size)}, query:{query}/{type(query)})')
 
-    def export_mongodb(self, database, collection):
+    def export_mongodb(self, database, collection, batch_size=10000):
         try:
-            if self.key and not self.sorted:
-                self.data.sort(key=lambda element: element[self.key])
-                self.sorted = True
+            self.sort()
         except Exception as error:
             print(f'error: {error} / dictlist.export_mongodb(database:{database}/{type(database)},',
-                  f'collection:{collection}/{type(collection)})')
-            print(f'tno value for the key({self.key}) at',
+                  f'collection:{collection}/{type(collection)}, batch_size:{batch_size}/{type(batch_size)})')
+            print(f'\tno value for the key({self.key}) at',
                   f'{list(filter(lambda element: self.key not in element, self.data))}')
             return None
 
         try:
             if len(self.data):
                 from theo.src.framework.System import System
-                from theo.database import MongoDB
 
                 if 'MongoDBCtrl' in System.get_components():
-                    System.execute_interface('MongoDBCtrl', 'insert', database, collection, self.data, self.key)
-                else:
+                    for index in range(0, len(self.data), batch_size):
+                        System.execute_interface(
+                            'MongoDBCtrl', 'insert', database, collection, self.data[index:index + batch_size], self.key)
+                elif DictList.get_mongodb_client() is None:
+                    from theo.database import MongoDB
+
                     mongodb = MongoDB()
-                    mongodb.insert(database, collection, self.data, unique_key=self.key)
+                    for index in range(0, len(self.data), batch_size):
+                        mongodb.insert(database, collection, self.data[index:index + batch_size], unique_key=self.key)
                     del mongodb
+                else:
+                    import pymongo
+
+                    mongodb_collection = DictList.get_mongodb_client()[database][collection]
+                    if self.key is not None:
+                        mongodb_collection.create_index(self.key, unique=True)
+
+                    for index in range(0, len(self.data), batch_size):
+                        # the copies are sent, because insert_many adds '_id' to the elements
+                        data = list(map(dict, self.data[index:index + batch_size]))
+                        if self.key is not None:
+                            mongodb_collection.bulk_write(list(map(
+                                lambda element: pymongo.ReplaceOne({self.key: element[self.key]}, element, upsert=True),
+                                data)), ordered=False)
+                        else:
+                            mongodb_collection.insert_many(data, ordered=False)
         except Exception as error:
             print(f'error: {error} / dictlist.export_mongodb(database:{database}/{type(database)},',
-                  f'collection:{collection}/{type(collection)})')
+                  f'collection:{collection}/{type(collection)}, batch_size:{batch_size}/{type(batch_size)})')
 
-    def plug_in_walker(self, walker, walker_delay=False, insert=False):
+    def plug_in_walker(self, walker, walker_delay=False, insert=False, batch=False, executor=None, backlog=16):
         try:
-            if self.key and not self.sorted:
-                self.data.sort(key=lambda element: element[self.key])
-                self.sorted = True
+            self.sort()
         except Exception as error:
             print(f'error: {error} / dictlist.plug_in_walker(walker:{walker}/{type(walker)},',
-                  f'walker_delay:{walker_delay}/{type(walker_delay)}, insert:{insert}/{type(insert)})')
+                  f'walker_delay:{walker_delay}/{type(walker_delay)}, insert:{insert}/{type(insert)},',
+                  f'batch:{batch}/{type(batch)}, executor:{executor}/{type(executor)}, backlog:{backlog}/{type(backlog)})')
             print(f'\tno value for the key({self.key}) at',
                   f'{list(filter(lambda element: self.key not in element, self.data))}')
             return None
 
         try:
-            handler = {'index': 0, 'walker': walker}
+            handler = {'index': 0, 'walker': walker, 'batch': batch}
+            if executor is not None:
+                handler['executor'] = executor
+                handler['queue'] = queue.Queue(maxsize=backlog)
+                handler['thread'] = threading.Thread(target=DictList.dispatch_walker, args=(handler,), daemon=True)
+                handler['thread'].start()
+
             if insert:
                 self.walkers.insert(0, handler)
             else:
@@ -475,25 +1402,180 @@ class DictList:
             return handler
         except Exception as error:
             print(f'error: {error} / dictlist.plug_in_walker(walker:{walker}/{type(walker)},',
-                  f'walker_delay:{walker_delay}/{type(walker_delay)}, insert:{insert}/{type(insert)})')
+                  f'walker_delay:{walker_delay}/{type(walker_delay)}, insert:{insert}/{type(insert)},',
+                  f'batch:{batch}/{type(batch)}, executor:{executor}/{type(executor)}, backlog:{backlog}/{type(backlog)})')
             return None
 
     def plug_out_walker(self, handler):
         try:
             self.walkers.remove(handler)
+
+            if 'queue' in handler:
+                handler['queue'].put(None)
+                handler['thread'].join()
         except Exception as error:
             print(f'error: {error} / dictlist.plug_out_walker(handler:{handler}/{type(handler)})')
 
+    def join_walker(self, handler=None):
+        try:
+            for walker in self.walkers if handler is None else [handler]:
+                if 'queue' in walker:
+                    walker['queue'].join()
+        except Exception as error:
+            print(f'error: {error} / dictlist.join_walker(handler:{handler}/{type(handler)})')
+
+    walker_chunk_size = 10000
+
     def run_walker(self):
         try:
             if len(self.walkers):
+                # the walkers run chunk by chunk, each walker visits the chunk from its own index
                 index = min(map(lambda walker: walker['index'], self.walkers))
-                while index != len(self.data):
+                while index < len(self.data):
+                    end = min(index + DictList.walker_chunk_size, len(self.data))
                     for walker in self.walkers:
-                        if walker['index'] == index:
-                            walker['walker'](self.data[index])
-                            walker['index'] = walker['index'] + 1
+                        if walker['index'] < end:
+                            self.walk(walker, end)
 
-                    index = index + 1
+                    index = end
         except Exception as error:
             print(f'error: {error} / dictlist.run_walker()')
+
+    def walk(self, walker, end):
+        start = walker['index']
+        elements = self.data[start:end]
+
+        if 'queue' in walker:
+            # the producer waits here while the backlog of the walker is full
+            walker['queue'].put(elements)
+            walker['index'] = max(walker['index'], end)
+            return
+
+        if walker['batch']:
+            walker['walker'](elements)
+            walker['index'] = max(walker['index'], end)
+        else:
+            for element in elements:
+                walker['walker'](element)
+                walker['index'] = walker['index'] + 1
+
+        if self.storage == 'columnar':
+            for offset, element in enumerate(elements):
+                self.data[start + offset] = element
+
+    @staticmethod
+    def dispatch_walker(handler):
+        # the chunks of a walker are submitted one by one to keep the order of the walker
+        while True:
+            elements = handler['queue'].get()
+            try:
+                if elements is None:
+                    return
+
+                handler['executor'].submit(DictList.walk_elements, handler['walker'], elements, handler['batch']).result()
+            except Exception as error:
+                print(f'error: {error} / DictList.dispatch_walker(walker:{handler["walker"]}/{type(handler["walker"])})')
+            finally:
+                handler['queue'].task_done()
+
+    @staticmethod
+    def walk_elements(walker, elements, batch):
+        if batch:
+            walker(elements)
+        else:
+            for element in elements:
+                walker(element)
+
+
+class DictListGroup:
+    """
+    DictListGroup is the groups of DictList what is made by dictlist.group_by(field).
+
+    Methods:
+        dictlist = group.agg(functions) : getting DictList(key=field) what has the aggregated values of the groups
+            functions (dict): the column and the function (or the list of functions)
+                              (ex. {'price': ['min', 'max'], 'volume': 'sum'})
+            The element of the result is {field: group, 'price_min': ..., 'price_max': ..., 'volume_sum': ...}
+    """
+
+    def __init__(self, dictlist, field):
+        self.dictlist = dictlist
+        self.field = field
+
+    def agg(self, functions):
+        try:
+            codes = dict()
+            elements = list()
+            for element in self.dictlist.get_list():
+                if self.field in element:
+                    codes.setdefault(element[self.field], len(codes))
+                    elements.append(element)
+
+            results = list(map(lambda group: {self.field: group}, codes))
+            for column, column_functions in functions.items():
+                column_functions = [column_functions] if isinstance(column_functions, str) else column_functions
+
+                group_codes, values = list(), list()
+                for element in elements:
+                    if column in element:
+                        group_codes.append(codes[element[self.field]])
+                        values.append(element[column])
+
+                for function in column_functions:
+                    for result, value in zip(results, self.calculate(group_codes, values, len(codes), function)):
+                        result[f'{column}_{function}'] = value
+
+            dictlist = DictList(key=self.field)
+            dictlist.extend_list(results)
+            return dictlist
+        except Exception as error:
+            print(f'error: {error} / group.agg(functions:{functions}/{type(functions)})')
+            return None
+
+    @staticmethod
+    def calculate(group_codes, values, group_count, function):
+        if function not in DictList.aggregate_functions:
+            raise Exception(f'unknown function({function})')
+
+        array = DictList.get_numeric_array(values) if len(values) else None
+        if array is not None and function in ['sum', 'mean'] and DictList.is_overflowed(array):
+            array = None
+
+        if array is not None:
+            import numpy
+
+            group_codes = numpy.asarray(group_codes, dtype=numpy.intp)
+            counts = numpy.bincount(group_codes, minlength=group_count)
+            if function == 'count':
+                return counts.tolist()
+
+            if function in ['sum', 'mean']:
+                if array.dtype.kind == 'f':
+                    sums = numpy.bincount(group_codes, weights=array, minlength=group_count)
+                    results = sums if function == 'sum' else sums / numpy.maximum(counts, 1)
+                else:
+                    sums = numpy.zeros(group_count, dtype=numpy.int64)
+                    numpy.add.at(sums, group_codes, array)
+                    results = sums if function == 'sum' else \
+                        numpy.array(list(map(lambda total, count: total / count if count else 0,
+                                             sums.tolist(), counts.tolist())))
+            else:
+                # the initial value has the dtype of the values, so an integer is not rounded by float
+                if array.dtype.kind == 'f':
+                    initial = numpy.inf if function == 'min' else -numpy.inf
+                elif array.dtype.kind == 'b':
+                    initial = function == 'min'
+                else:
+                    limit = numpy.iinfo(array.dtype)
+                    initial = limit.max if function == 'min' else limit.min
+
+                results = numpy.full(group_count, initial, dtype=array.dtype)
+                (numpy.minimum if function == 'min' else numpy.maximum).at(results, group_codes, array)
+
+            return list(map(lambda result, count: result if count else None, results.tolist(), counts.tolist()))
+
+        groups = list(map(lambda _: list(), range(group_count)))
+        for group_code, value in zip(group_codes, values):
+            groups[group_code].append(value)
+
+        return list(map(lambda group: DictList.calculate(group, function), groups))
@@ -0,0 +1,131 @@
+import itertools
+from theo.src.framework.DictList import DictList
+
+
+class DictListView:
+    """
+    DictListView is a lazy view of DictList.
+    Filtering, slicing and selecting make a new view without making a list.
+    The elements are read from the DictList when the view is iterated, so the view follows the changes of the DictList.
+    The first filter uses the indexes and the sorted key of the DictList. (refer the queries of DictList)
+
+    Methods:
+        view = dictlist.view()
+
+        view = view.filter(value)      : filtering the elements what are matched with the stored key and argument value
+        view = view.filter(key, value) : filtering the elements what are matched with argument key and argument value
+        view = view.filter(queries)    : filtering the elements what are matched with argument queries
+        view = view.filter(function)   : filtering the elements what the function returns True
+        view = view[start:end:step]    : slicing the elements (a negative index makes a list at the iteration)
+        view = view.select(*fields)    : selecting the fields of the elements (the elements are new dictionaries)
+
+        element = view[index]
+        length = len(view)
+        for element in view: ...
+        list = view.to_list()
+        dictlist = view.to_dictlist(key=None)
+
+    Example:
+        kospi_view = kospi_dictlist.view().filter('tag', 'kospi50').filter([{'key': 'per', 'operator': '<', 'value': 10}])
+        for element in kospi_view.select('code', 'per')[:10]:
+            print(element)
+    """
+
+    def __init__(self, dictlist, operations=None):
+        self.dictlist = dictlist
+        self.operations = operations if operations is not None else list()
+
+    def __str__(self):
+        return f'DictListView(dictlist:{self.dictlist}/operations:{len(self.operations)})'
+
+    def chain(self, operation):
+        return DictListView(self.dictlist, self.operations + [operation])
+
+    def filter(self, attr1, attr2=None):
+        try:
+            if callable(attr1) and attr2 is None:
+                return self.chain(('function', attr1))
+            elif attr2 is None and isinstance(attr1, list):
+                DictList.get_predicates(attr1)
+                return self.chain(('queries', attr1))
+            elif attr2 is None:
+                return self.chain(('queries', [{'key': self.dictlist.key, 'value': attr1}]))
+            else:
+                return self.chain(('queries', [{'key': attr1, 'value': attr2}]))
+        except Exception as error:
+            print(f'error: {error} / view.filter(attr1:{attr1}/{type(attr1)}, attr2:{attr2}/{type(attr2)})')
+            return None
+
+    def select(self, *fields):
+        return self.chain(('select', fields))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.chain(('slice', index))
+
+        if index < 0:
+            return self.to_list()[index]
+
+        missing = object()
+        element = next(itertools.islice(iter(self), index, None), missing)
+        if element is missing:
+            raise IndexError('DictListView index out of range')
+
+        return element
+
+    def __len__(self):
+        if not len(self.operations):
+            return self.dictlist.count()
+
+        return sum(map(lambda _: 1, iter(self)))
+
+    def __iter__(self):
+        operations = self.operations
+
+        # the first filter or slice reads the DictList directly
+        if len(operations) and operations[0][0] == 'queries':
+            elements = self.dictlist.iter_query(operations[0][1])
+            operations = operations[1:]
+        elif len(operations) and operations[0][0] == 'slice' and self.is_forward(operations[0][1]):
+            data = self.dictlist.get_list()
+            elements = map(data.__getitem__, range(*operations[0][1].indices(len(data))))
+            operations = operations[1:]
+        else:
+            elements = iter(self.dictlist.get_list())
+
+        for operation, argument in operations:
+            if operation == 'queries':
+                predicates = DictList.get_predicates(argument)
+                elements = filter(lambda element, predicates=predicates: DictList.match(element, predicates), elements)
+            elif operation == 'function':
+                elements = filter(argument, elements)
+            elif operation == 'select':
+                elements = map(lambda element, fields=argument:
+                               {field: element[field] for field in fields if field in element}, elements)
+            elif self.is_forward(argument):
+                elements = itertools.islice(elements, argument.start, argument.stop, argument.step)
+            else:
+                elements = iter(list(elements)[argument])
+
+        return elements
+
+    @staticmethod
+    def is_forward(index):
+        return all(map(lambda value: value is None or value >= 0, [index.start, index.stop])) \
+            and (index.step is None or index.step > 0)
+
+    def to_list(self):
+        try:
+            return list(self)
+        except Exception as error:
+            print(f'error: {error} / view.to_list()')
+            return None
+
+    def to_dictlist(self, key=None):
+        try:
+            dictlist = DictList(key=key)
+            dictlist.extend_list(list(self))
+            return dictlist
+        except Exception as error:
+            print(f'error: {error} / view.to_dictlist(key:{key}/{type(key)})')
+            return None
@@ -2,6 +2,11 @@ import logging
 import os
 import datetime
 import shutil
+import threading
+import queue
+import atexit
+import gzip
+import json
 from theo.src.framework.DictList import DictList
 
 
@@ -22,11 +27,56 @@ class Log:
     Initially, the storing does not work.
     To store a log, calling configure(store_enabled=True) is needed before construct Log class.
 
+    The configurations are kept in memory, a new name or level only marks the configurations to be saved.
+    A background thread saves the marked configurations every config_interval seconds (and at the exit),
+        so a burst of new names makes one writing of the files.
+    The thread also watches the modified time of the files, and reloads the changed files (config_reload_enabled).
+    So the levels of a name can be changed at runtime by editing name_config.json, without a restart.
+    The names what are not in the edited file are kept.
+
+    The level values of a Log are resolved once and cached.
+    log.print compares the level before making the message, so a disabled log costs a little.
+    To avoid making the message of a disabled log, pass the values as arguments instead of a formatted string.
+        log.print('debug', 'price', price) instead of log.print('debug', f'price {price}')
+
+    With configure(async_enabled=True), the printing and storing are written by a background writer thread.
+    log.print only puts the record into a bounded queue, so the calling thread does not wait for the disk.
+    The writer writes the queued records in a batch and flushes a handler once per batch.
+    If the queue is full, async_overflow decides what to do.
+        'block' : waiting until the writer makes a room (no log is lost)
+        'drop'  : dropping the record
+        'count' : dropping the record and counting it (Log.get_dropped_count())
+    A log what is dropped by one or more sinks (print, store, structured) is counted once.
+    The queued records are written when the program exits, or when Log.shutdown() is called.
+
+    The stored log file is rotated when the day is changed, a new file is opened in the directory of the new day.
+    With rotation_bytes, the file is also rotated when its size is over rotation_bytes.
+    With rotation_compress=True, a rotated file is compressed to .log.gz by a background thread.
+    The directories older than over_time_days are removed by a background thread at the start and at every new day,
+        so the construction of the first Log does not wait for the removing.
+
+    With configure(structured_enabled=True), the stored logs are also written as JSON lines into HH-MM-SS.jsonl.
+    A line has time (epoch seconds), name, level, message and fields, fields are the keyword arguments of log.print.
+        {"time": 1546398000.123, "name": "Order", "level": "info", "message": "filled", "fields": {"code": "005930"}}
+
+    Every name keeps the counters in Log.counters, log.get_counters() returns a copy.
+        levels  : the number of the printed or stored logs by level
+        bytes   : the size of the records written by the sinks, counted after the write
+        dropped : the number of the logs dropped by the async overflow ('drop', 'count')
+
     Methods:
         Log.configure(print_enabled=None, store_enabled=None, config_directory=None, log_directory=None,
-                      over_time_log_clear_enabled=None, over_time_days=None)
+                      over_time_log_clear_enabled=None, over_time_days=None,
+                      async_enabled=None, async_queue_size=None, async_overflow=None,
+                      rotation_bytes=None, rotation_compress=None, structured_enabled=None,
+                      config_interval=None, config_reload_enabled=None)
+        Log.shutdown() : saving the configurations, writing the queued records and stopping the threads
+        configuration = Log.get_configuration() : the arguments of configure what make the same Log (ex. in a child process)
+        dropped_count = Log.get_dropped_count()
         log = Log(name)
-        log.print(level, message)
+        log.print(level, *messages, **fields)
+        enabled = log.is_enabled(level) : whether the log of the level is printed or stored
+        counters = log.get_counters()
 
     Example:
         from theo.framework import Log
@@ -37,9 +87,11 @@ class Log:
     """
 
     is_started = False
+    start_lock = threading.Lock()
 
     print_logger = None
     store_logger = None
+    structured_logger = None
 
     name_config_dictlist = DictList(key='name')
     level_config_dictlist = DictList(key='level')
@@ -57,10 +109,37 @@ class Log:
     over_time_log_clear_enabled = False
     over_time_days = 3
 
+    level_values = dict()
+    config_version = 0
+
+    config_interval = 1
+    config_reload_enabled = True
+    config_dirty = False
+    config_lock = threading.RLock()
+    config_mtimes = dict()
+    config_watcher = None
+
+    async_enabled = False
+    async_queue_size = 10000
+    async_overflow = 'block'
+    async_overflows = ('block', 'drop', 'count')
+
+    writer = None
+
+    rotation_bytes = None
+    rotation_compress = False
+
+    structured_enabled = False
+
+    counters = dict()
+
     @staticmethod
     def configure(print_enabled=None, store_enabled=None,
                   config_directory=None, log_directory=None,
-                  over_time_log_clear_enabled=None, over_time_days=None):
+                  over_time_log_clear_enabled=None, over_time_days=None,
+                  async_enabled=None, async_queue_size=None, async_overflow=None,
+                  rotation_bytes=None, rotation_compress=None, structured_enabled=None,
+                  config_interval=None, config_reload_enabled=None):
         try:
             if not Log.is_started:
                 Log.print_enabled = True if print_enabled else Log.print_enabled
@@ -74,6 +153,24 @@ class Log:
                 Log.over_time_log_clear_enabled = \
                     True if over_time_log_clear_enabled else Log.over_time_log_clear_enabled
                 Log.over_time_days = over_time_days if over_time_days else Log.over_time_days
+
+                if async_overflow is not None and async_overflow not in Log.async_overflows:
+                    raise ValueError(f'async_overflow should be one of {Log.async_overflows}')
+
+                Log.async_enabled = True if async_enabled else Log.async_enabled
+                Log.async_queue_size = async_queue_size if async_queue_size else Log.async_queue_size
+                Log.async_overflow = async_overflow if async_overflow else Log.async_overflow
+
+                Log.rotation_bytes = rotation_bytes if rotation_bytes else Log.rotation_bytes
+                Log.rotation_compress = True if rotation_compress else Log.rotation_compress
+
+                Log.structured_enabled = True if structured_enabled else Log.structured_enabled
+
+                Log.config_interval = config_interval if config_interval else Log.config_interval
+                Log.config_reload_enabled = \
+                    config_reload_enabled if config_reload_enabled is not None else Log.config_reload_enabled
+
+                Log.config_version = Log.config_version + 1
         except Exception as error:
             print(f'error: {error} / Log.configure(print_enabled:{print_enabled}/{type(print_enabled)},',
                   f'store_enabled:{store_enabled}/{type(store_enabled)},')
@@ -81,103 +178,573 @@ class Log:
                   f'log_directory:{log_directory}/{type(log_directory)}')
             print(f'\tover_time_log_clear_enabled:{over_time_log_clear_enabled}/{type(over_time_log_clear_enabled)},',
                   f'over_time_days:{over_time_days}/{type(over_time_days)}')
+            print(f'\tasync_enabled:{async_enabled}/{type(async_enabled)},',
+                  f'async_queue_size:{async_queue_size}/{type(async_queue_size)},',
+                  f'async_overflow:{async_overflow}/{type(async_overflow)},')
+            print(f'\trotation_bytes:{rotation_bytes}/{type(rotation_bytes)},',
+                  f'rotation_compress:{rotation_compress}/{type(rotation_compress)},',
+                  f'structured_enabled:{structured_enabled}/{type(structured_enabled)},')
+            print(f'\tconfig_interval:{config_interval}/{type(config_interval)},',
+                  f'config_reload_enabled:{config_reload_enabled}/{type(config_reload_enabled)})')
 
-    def __init__(self, name):
+    @staticmethod
+    def get_configuration():
+        return {'print_enabled': Log.print_enabled, 'store_enabled': Log.store_enabled,
+                'config_directory': Log.config_directory, 'log_directory': Log.log_directory,
+                'over_time_log_clear_enabled': Log.over_time_log_clear_enabled, 'over_time_days': Log.over_time_days,
+                'async_enabled': Log.async_enabled, 'async_queue_size': Log.async_queue_size,
+                'async_overflow': Log.async_overflow,
+                'rotation_bytes': Log.rotation_bytes, 'rotation_compress': Log.rotation_compress,
+                'structured_enabled': Log.structured_enabled,
+                'config_interval': Log.config_interval, 'config_reload_enabled': Log.config_reload_enabled}
+
+    @staticmethod
+    def shutdown():
         try:
-            self.name = name
+            if Log.config_watcher is not None:
+                Log.config_watcher.stop()
+                Log.config_watcher = None
 
-            if not Log.is_started:
-                print(f'Log Enabled(print:{Log.print_enabled}, store:{Log.store_enabled})')
-                print(f'Log Directories(config:{Log.config_directory}' + (f', log:{Log.log_directory})' if Log.store_enabled else ')'))
-                if Log.store_enabled:
-                    print(f'Log Option(over_time_log_clear_enabled:{Log.over_time_log_clear_enabled}'
-                          + f', days:{Log.over_time_days})' if Log.over_time_log_clear_enabled else ')')
+            Log.save_config()
+
+            if Log.writer is not None:
+                Log.writer.stop()
+                Log.writer = None
 
-                if not os.path.exists(Log.config_directory):
-                    os.makedirs(Log.config_directory)
+                # the queue handlers are swapped back to the real handlers, so the later records are written directly
+                for logger in (Log.print_logger, Log.store_logger, Log.structured_logger):
+                    if logger is None:
+                        continue
 
-                if os.path.exists(Log.name_config_path):
-                    Log.name_config_dictlist.import_json(Log.name_config_path)
+                    for handler in list(logger.handlers):
+                        if isinstance(handler, LogQueueHandler):
+                            logger.removeHandler(handler)
+                            logger.addHandler(handler.handler)
+        except Exception as error:
+            print(f'error: {error} / Log.shutdown()')
 
-                if not os.path.exists(Log.level_config_path):
-                    Log.level_config_dictlist.append({'level': 'critical', 'value': 100})
-                    Log.level_config_dictlist.append({'level': 'info', 'value': 50})
-                    Log.level_config_dictlist.append({'level': 'debug', 'value': 30})
-                    Log.level_config_dictlist.append({'level': 'none', 'value': 0})
+    @staticmethod
+    def get_dropped_count():
+        return Log.writer.dropped_count if Log.writer is not None else 0
 
-                    Log.level_config_dictlist.export_json(Log.level_config_path)
-                else:
-                    Log.level_config_dictlist.import_json(Log.level_config_path)
+    @staticmethod
+    def add_handler(logger, handler):
+        if not Log.async_enabled:
+            logger.addHandler(handler)
+            return
+
+        if Log.writer is None:
+            Log.writer = LogWriter(Log.async_queue_size, Log.async_overflow)
+            Log.writer.start()
+
+        logger.addHandler(LogQueueHandler(Log.writer, handler))
+
+    @staticmethod
+    def save_config():
+        try:
+            # the configurations are copied in the lock and written out of the lock
+            with Log.config_lock:
+                if not Log.config_dirty:
+                    return
+
+                Log.config_dirty = False
+
+                name_config_dictlist = DictList(key='name')
+                name_config_dictlist.extend_list(Log.name_config_dictlist.get_list())
+                level_config_dictlist = DictList(key='level')
+                level_config_dictlist.extend_list(Log.level_config_dictlist.get_list())
+
+            name_config_dictlist.export_json(Log.name_config_path)
+            level_config_dictlist.export_json(Log.level_config_path)
 
-                if Log.print_enabled:
-                    Log.print_logger = logging.getLogger('print')
-                    Log.print_logger.setLevel(logging.INFO)
+            for path in (Log.name_config_path, Log.level_config_path):
+                if os.path.exists(path):
+                    Log.config_mtimes[path] = os.path.getmtime(path)
+        except Exception as error:
+            print(f'error: {error} / Log.save_config()')
 
-                    print_stream_handler = logging.StreamHandler()
-                    print_stream_handler.setFormatter(logging.Formatter('[%(asctime)s]%(message)s'))
-                    Log.print_logger.addHandler(print_stream_handler)
+    @staticmethod
+    def reload_config():
+        try:
+            for path, key in ((Log.name_config_path, 'name'), (Log.level_config_path, 'level')):
+                if not os.path.exists(path):
+                    continue
+
+                mtime = os.path.getmtime(path)
+                if Log.config_mtimes.get(path) == mtime:
+                    continue
+
+                try:
+                    file_handler = open(path, 'r', encoding='UTF-8-sig')
+                    data = json.load(file_handler)
+                    file_handler.close()
+                except ValueError:
+                    # the file is being written, it is read again at the next polling
+                    continue
+
+                Log.config_mtimes[path] = mtime
+
+                dictlist = DictList(key=key)
+                dictlist.extend_list(data)
+
+                with Log.config_lock:
+                    current_dictlist = Log.name_config_dictlist if key == 'name' else Log.level_config_dictlist
+                    for element in current_dictlist.get_list():
+                        if not dictlist.get(element[key]):
+                            dictlist.append(element)
+                            Log.config_dirty = True
+                    dictlist.sort()
+
+                    if key == 'name':
+                        Log.name_config_dictlist = dictlist
+                    else:
+                        Log.level_config_dictlist = dictlist
+
+                    Log.level_values = dict()
+                    Log.config_version = Log.config_version + 1
+        except Exception as error:
+            print(f'error: {error} / Log.reload_config()')
 
-                if Log.store_enabled:
-                    if not os.path.exists(Log.log_directory):
-                        os.makedirs(Log.log_directory)
+    @staticmethod
+    def start_log_clear():
+        if Log.over_time_log_clear_enabled:
+            threading.Thread(target=Log.clear_over_time_logs, name='LogClear', daemon=True).start()
+
+    @staticmethod
+    def clear_over_time_logs():
+        try:
+            now = datetime.datetime.now()
+            for directory in os.listdir(Log.log_directory):
+                path = os.path.join(Log.log_directory, directory)
+                if not os.path.isdir(path) or path == Log.log_store_directory:
+                    continue
+
+                try:
+                    date = datetime.datetime.strptime(directory, '%Y-%m-%d')
+                except ValueError:
+                    continue
+
+                if Log.over_time_days <= (now - date).days:
+                    shutil.rmtree(path, ignore_errors=True)
+        except Exception as error:
+            print(f'error: {error} / Log.clear_over_time_logs()')
+
+    @staticmethod
+    def compress_log(path):
+        try:
+            with open(path, 'rb') as source, gzip.open(path + '.gz', 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.remove(path)
+        except Exception as error:
+            print(f'error: {error} / Log.compress_log(path:{path}/{type(path)})')
+
+    @staticmethod
+    def start():
+        # the first Log starts the logging, the lock keeps Logs what are made together by threads from starting twice
+        with Log.start_lock:
+            if Log.is_started:
+                return
+
+            print(f'Log Enabled(print:{Log.print_enabled}, store:{Log.store_enabled})')
+            print(f'Log Directories(config:{Log.config_directory}' + (f', log:{Log.log_directory})' if Log.store_enabled else ')'))
+            if Log.async_enabled:
+                print(f'Log Async(queue_size:{Log.async_queue_size}, overflow:{Log.async_overflow})')
+            if Log.store_enabled:
+                print(f'Log Option(over_time_log_clear_enabled:{Log.over_time_log_clear_enabled}'
+                      + f', days:{Log.over_time_days})' if Log.over_time_log_clear_enabled else ')')
+                if Log.rotation_bytes or Log.rotation_compress:
+                    print(f'Log Rotation(bytes:{Log.rotation_bytes}, compress:{Log.rotation_compress})')
+
+            if not os.path.exists(Log.config_directory):
+                os.makedirs(Log.config_directory)
+
+            if os.path.exists(Log.name_config_path):
+                Log.name_config_dictlist.import_json(Log.name_config_path)
+
+            if not os.path.exists(Log.level_config_path):
+                Log.level_config_dictlist.append({'level': 'critical', 'value': 100})
+                Log.level_config_dictlist.append({'level': 'info', 'value': 50})
+                Log.level_config_dictlist.append({'level': 'debug', 'value': 30})
+                Log.level_config_dictlist.append({'level': 'none', 'value': 0})
+
+                Log.level_config_dictlist.export_json(Log.level_config_path)
+            else:
+                Log.level_config_dictlist.import_json(Log.level_config_path)
 
-                    if Log.over_time_log_clear_enabled:
-                        for directory in os.listdir(Log.log_directory):
-                            if os.path.isdir(os.path.join(Log.log_directory, directory)) \
-                                and (Log.over_time_days <= (datetime.datetime.now() - datetime.datetime.strptime(directory, '%Y-%m-%d')).days):
-                                    shutil.rmtree(os.path.join(Log.log_directory, directory))
+            for path in (Log.name_config_path, Log.level_config_path):
+                if os.path.exists(path):
+                    Log.config_mtimes[path] = os.path.getmtime(path)
 
-                    Log.log_store_directory = os.path.join(Log.log_directory, datetime.datetime.now().strftime('%Y-%m-%d'))
-                    if not os.path.exists(Log.log_store_directory):
-                        os.makedirs(Log.log_store_directory)
+            Log.config_watcher = LogConfigWatcher(Log.config_interval)
+            Log.config_watcher.start()
+            atexit.register(Log.shutdown)
 
-                    Log.store_logger = logging.getLogger('store')
-                    Log.store_logger.setLevel(logging.INFO)
+            if Log.print_enabled:
+                Log.print_logger = logging.getLogger('print')
+                Log.print_logger.setLevel(logging.INFO)
 
-                    file_handler = logging.FileHandler(
-                        os.path.join(Log.log_store_directory, datetime.datetime.now().strftime('%H-%M-%S.log')))
-                    file_handler.setFormatter(logging.Formatter('[%(asctime)s]%(message)s'))
-                    Log.store_logger.addHandler(file_handler)
+                print_stream_handler = LogStreamHandler()
+                print_stream_handler.setFormatter(logging.Formatter('[%(asctime)s]%(message)s'))
+                Log.add_handler(Log.print_logger, print_stream_handler)
 
-                Log.is_started = True
+            if Log.store_enabled:
+                if not os.path.exists(Log.log_directory):
+                    os.makedirs(Log.log_directory)
 
-            self.level_config = Log.name_config_dictlist.get(name)
-            if not self.level_config:
-                self.level_config = {'name': name, 'print': 'info', 'store': 'debug'}
+                Log.store_logger = logging.getLogger('store')
+                Log.store_logger.setLevel(logging.INFO)
 
-                Log.name_config_dictlist.append(self.level_config)
-                Log.name_config_dictlist.export_json(Log.name_config_path)
+                file_handler = LogFileHandler(Log.log_directory, Log.rotation_bytes, Log.rotation_compress)
+                file_handler.setFormatter(logging.Formatter('[%(asctime)s]%(message)s'))
+                Log.add_handler(Log.store_logger, file_handler)
+
+                if Log.structured_enabled:
+                    Log.structured_logger = logging.getLogger('structured')
+                    Log.structured_logger.setLevel(logging.INFO)
+
+                    structured_handler = LogFileHandler(
+                        Log.log_directory, Log.rotation_bytes, Log.rotation_compress, extension='.jsonl')
+                    structured_handler.setFormatter(LogJsonFormatter())
+                    Log.add_handler(Log.structured_logger, structured_handler)
+
+                Log.start_log_clear()
+
+            Log.is_started = True
+
+    def __init__(self, name):
+        try:
+            self.name = name
+
+            if not Log.is_started:
+                Log.start()
+
+            with Log.config_lock:
+                self.level_config = Log.name_config_dictlist.get(name)
+                if not self.level_config:
+                    self.level_config = {'name': name, 'print': 'info', 'store': 'debug'}
+
+                    Log.name_config_dictlist.append(self.level_config)
+                    Log.config_dirty = True
+
+            self.counter = Log.counters.setdefault(name, {'levels': dict(), 'bytes': 0, 'dropped': 0})
+
+            self.config_version = Log.config_version
+            self.update_thresholds()
         except Exception as error:
             print(f'error: {error} / Log(name:{name}/{type(name)})')
 
+    def update_thresholds(self):
+        # the thresholds are resolved again when the configuration is changed or reloaded
+        with Log.config_lock:
+            if self.config_version != Log.config_version:
+                level_config = Log.name_config_dictlist.get(self.name)
+                if level_config:
+                    self.level_config = level_config
+
+        self.config_version = Log.config_version
+        self.print_threshold = Log.get_level_value(self.level_config['print']) if Log.print_logger else None
+        self.store_threshold = Log.get_level_value(self.level_config['store']) if Log.store_logger else None
+
     @staticmethod
     def get_level_value(level):
         try:
-            level_config = Log.level_config_dictlist.get(level)
+            level_value = Log.level_values.get(level)
+            if level_value is not None:
+                return level_value
 
-            if not level_config:
-                level_config = {'level': level, 'value': 50}
+            with Log.config_lock:
+                level_config = Log.level_config_dictlist.get(level)
 
-                Log.level_config_dictlist.append(level_config)
-                Log.level_config_dictlist.export_json(Log.level_config_path)
+                if not level_config:
+                    level_config = {'level': level, 'value': 50}
+
+                    Log.level_config_dictlist.append(level_config)
+                    Log.config_dirty = True
 
-            return level_config['value']
+                Log.level_values[level] = level_config['value']
+                return level_config['value']
         except Exception as error:
             print(f'error: {error} / Log.get_level_value(level:{level}/{type(level)})')
             return 50
 
-    def print(self, level, *messages):
+    def is_enabled(self, level):
         try:
-            log = f'[{self.name}][{level}]'
-            for message in messages:
-                log += ' ' + str(message)
+            if self.config_version != Log.config_version:
+                self.update_thresholds()
+
+            level_value = Log.level_values.get(level)
+            if level_value is None:
+                level_value = Log.get_level_value(level)
+
+            return (self.print_threshold is not None and level_value >= self.print_threshold) \
+                or (self.store_threshold is not None and level_value >= self.store_threshold)
+        except Exception as error:
+            print(f'error: {error} / log.is_enabled(level:{level}/{type(level)})')
+            return False
+
+    def get_counters(self):
+        return {'levels': dict(self.counter['levels']), 'bytes': self.counter['bytes'], 'dropped': self.counter['dropped']}
+
+    def print(self, level, *messages, **fields):
+        try:
+            if self.config_version != Log.config_version:
+                self.update_thresholds()
+
+            level_value = Log.level_values.get(level)
+            if level_value is None:
+                level_value = Log.get_level_value(level)
 
-            level_value = Log.get_level_value(level)
+            is_printed = self.print_threshold is not None and level_value >= self.print_threshold
+            is_stored = self.store_threshold is not None and level_value >= self.store_threshold
+            if not (is_printed or is_stored):
+                return
 
-            if Log.print_logger and level_value >= Log.get_level_value(self.level_config['print']):
-                Log.print_logger.info(log)
+            message = ''
+            for value in messages:
+                message += ' ' + str(value)
 
-            if Log.store_logger and level_value >= Log.get_level_value(self.level_config['store']):
-                Log.store_logger.info(log)
+            log = f'[{self.name}][{level}]' + message
+            for field, value in fields.items():
+                log += f' {field}={value}'
+            # the sinks of a log share the event, so a log dropped by several sinks is counted once
+            event = [False]
+            extra = {'log_name': self.name, 'log_event': event}
+
+            levels = self.counter['levels']
+            levels[level] = levels.get(level, 0) + 1
+
+            if is_printed:
+                Log.print_logger.info(log, extra=extra)
+
+            if is_stored:
+                Log.store_logger.info(log, extra=extra)
+
+                if Log.structured_logger:
+                    Log.structured_logger.info(log, extra={**extra, 'log_level': level,
+                                                           'log_message': message[1:], 'log_fields': fields})
         except Exception as error:
-            print(f'error: {error} / log.print(level:{level}/{type(level)}, message:{message}/{type(message)})')
+            print(f'error: {error} / log.print(level:{level}/{type(level)}, messages:{messages}/{type(messages)},',
+                  f'fields:{fields}/{type(fields)})')
+
+
+class LogConfigWatcher(threading.Thread):
+    # the background thread what reloads the edited configurations and saves the changed configurations
+    def __init__(self, interval):
+        super().__init__(name='LogConfigWatcher', daemon=True)
+
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            # reloading first, so the edited file is merged before it is overwritten by saving
+            if Log.config_reload_enabled:
+                Log.reload_config()
+
+            Log.save_config()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class LogStreamHandler(logging.StreamHandler):
+    # a stream handler what writes a batch of records and flushes once
+    def emit(self, record):
+        self.emit_batch([record])
+
+    def emit_batch(self, records):
+        self.acquire()
+        try:
+            for record in records:
+                try:
+                    self.write_record(record)
+                except Exception:
+                    self.handleError(record)
+
+            self.flush()
+        finally:
+            self.release()
+
+    def write_record(self, record):
+        message = self.format(record) + self.terminator
+        self.stream.write(message)
+        self.count_bytes(record, self.get_size(message))
+
+    def get_size(self, message):
+        return len(message.encode(getattr(self.stream, 'encoding', None) or 'utf-8', errors='replace'))
+
+    @staticmethod
+    def count_bytes(record, size):
+        # the bytes are counted after the write, so a dropped or failed record is not counted
+        counter = Log.counters.get(getattr(record, 'log_name', None))
+        if counter is not None:
+            counter['bytes'] = counter['bytes'] + size
+
+
+class LogJsonFormatter(logging.Formatter):
+    # a record of Log.structured_logger is formatted as a JSON line, a value what JSON does not know is written as str
+    def format(self, record):
+        return json.dumps({'time': record.created, 'name': record.log_name, 'level': record.log_level,
+                           'message': record.log_message, 'fields': record.log_fields},
+                          ensure_ascii=False, default=str)
+
+
+class LogFileHandler(LogStreamHandler, logging.FileHandler):
+    """
+    LogFileHandler writes the records into log_directory/YYYY-MM-DD/HH-MM-SS.log (or the extension).
+    The file is rotated when the day of a record is changed or the written size is over rotation_bytes.
+    """
+
+    def __init__(self, log_directory, rotation_bytes=None, rotation_compress=False, extension='.log'):
+        self.log_directory = log_directory
+        self.extension = extension
+        self.rotation_bytes = rotation_bytes
+        self.rotation_compress = rotation_compress
+
+        path = self.get_path(datetime.datetime.now())
+        super().__init__(path)
+
+        self.written_bytes = 0
+
+    def get_path(self, time):
+        Log.log_store_directory = os.path.join(self.log_directory, time.strftime('%Y-%m-%d'))
+        if not os.path.exists(Log.log_store_directory):
+            os.makedirs(Log.log_store_directory)
+
+        # the next day is the time of the rotation by the day
+        self.rotation_time = datetime.datetime.combine(time.date() + datetime.timedelta(days=1), datetime.time()).timestamp()
+
+        path = os.path.join(Log.log_store_directory, time.strftime('%H-%M-%S'))
+        index = 0
+        while os.path.exists(path + (f'-{index}' if index else '') + self.extension) \
+                or os.path.exists(path + (f'-{index}' if index else '') + self.extension + '.gz'):
+            index = index + 1
+
+        return path + (f'-{index}' if index else '') + self.extension
+
+    def write_record(self, record):
+        message = self.format(record) + self.terminator
+        size = self.get_size(message)
+
+        if record.created >= self.rotation_time \
+                or (self.rotation_bytes and self.written_bytes and self.written_bytes + size > self.rotation_bytes):
+            self.rotate(record.created)
+
+        self.stream.write(message)
+        self.written_bytes = self.written_bytes + size
+        self.count_bytes(record, size)
+
+    def rotate(self, created):
+        is_new_day = created >= self.rotation_time
+
+        self.stream.flush()
+        self.stream.close()
+
+        if self.rotation_compress:
+            threading.Thread(target=Log.compress_log, args=(self.baseFilename,), name='LogCompress', daemon=True).start()
+
+        self.baseFilename = os.path.abspath(self.get_path(datetime.datetime.fromtimestamp(created)))
+        self.stream = self._open()
+        self.written_bytes = 0
+
+        if is_new_day:
+            Log.start_log_clear()
+
+
+class LogQueueHandler(logging.Handler):
+    # the handler of a logger in the async mode, it passes the record and the real handler to the writer
+    def __init__(self, writer, handler):
+        super().__init__()
+
+        self.writer = writer
+        self.handler = handler
+
+    def emit(self, record):
+        if not self.writer.put(self.handler, record):
+            event = getattr(record, 'log_event', None)
+            if event is not None:
+                if event[0]:
+                    return
+                event[0] = True
+
+            if self.writer.overflow == 'count':
+                self.writer.dropped_count = self.writer.dropped_count + 1
+
+            counter = Log.counters.get(getattr(record, 'log_name', None))
+            if counter is not None:
+                counter['dropped'] = counter['dropped'] + 1
+
+    def close(self):
+        self.handler.close()
+        super().close()
+
+
+class LogWriter(threading.Thread):
+    """
+    LogWriter is the background thread of Log(async_enabled=True).
+    It takes the queued records as many as batch_size at once, and writes them handler by handler.
+    """
+
+    batch_size = 1000
+
+    def __init__(self, queue_size, overflow):
+        super().__init__(name='LogWriter', daemon=True)
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.overflow = overflow
+        self.dropped_count = 0
+        self.is_stopped = False
+        self.lock = threading.Lock()
+
+    def put(self, handler, record):
+        # returning whether the record is queued or written
+        with self.lock:
+            if self.is_stopped:
+                # no thread takes the queue after stopping, so the record is written synchronously
+                handler.emit_batch([record])
+                return True
+
+            if self.overflow == 'block':
+                self.queue.put((handler, record))
+                return True
+
+            try:
+                self.queue.put_nowait((handler, record))
+                return True
+            except queue.Full:
+                return False
+
+    def run(self):
+        is_stopped = False
+        while not is_stopped:
+            items = [self.queue.get()]
+            while len(items) < LogWriter.batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batches = dict()
+            for item in items:
+                if item is None:
+                    is_stopped = True
+                else:
+                    batches.setdefault(item[0], list()).append(item[1])
+
+            for handler, records in batches.items():
+                try:
+                    handler.emit_batch(records)
+                except Exception as error:
+                    print(f'error: {error} / LogWriter.run()')
+
+    def stop(self):
+        # the stop mark is queued behind the records, so all queued records are written before stopping
+        with self.lock:
+            if self.is_stopped:
+                return
+
+            self.is_stopped = True
+            self.queue.put(None)
+
+        self.join()
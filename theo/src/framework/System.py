@@ -1,7 +1,17 @@
 import threading
 import queue
 import cmd
+import asyncio
+import inspect
+import functools
+import concurrent.futures
+import time
+import atexit
+import multiprocessing
+from multiprocessing import shared_memory
 from theo.src.framework.DictList import DictList
+from theo.src.framework.ColumnarList import ColumnarList
+from theo.src.framework.Log import Log
 
 
 class System:
@@ -13,14 +23,61 @@ class System:
     Because the interface module works with registered interfaces by components,
         please use System with Component.
 
+    The interfaces are found by a dictionary of (component, command), and the argument numbers are kept as a set.
+    So registering and executing an interface do not depend on the number of the interfaces.
+    On a hot path, get_interface returns the registered function once, and calling it skips the finding and the checking.
+        For a component with worker, it returns a function what calls the interface through the mailbox and waits.
+
+    An interface can be a coroutine function (async def).
+    execute_interface_async is awaited in an event loop of the caller, and the calls of I/O interfaces overlap.
+        a coroutine function runs on the event loop of System (a background thread)
+        a function runs on the thread pool of System (executor_workers threads), so it does not block the caller loop
+    execute_interface of a coroutine function waits for the result of the System event loop,
+        so it can not be called in a coroutine function of an interface. (use execute_interface_async)
+
+    A component starts after its dependencies are started.
+    The dependencies are the names (or the classes) of components in Component.dependencies
+        or in the dependencies argument of register_component.
+    startup_components(parallel=True) starts the independent components together on a thread pool,
+        so the startup takes the time of the longest dependency chain instead of the sum.
+    It returns the seconds of each started component, {name: seconds}.
+    A component what fails, or depends on a component what is not registered, failed or circular, is not started.
+
+    submit_interface runs an interface without waiting and returns concurrent.futures.Future.
+    A component with worker (Component.worker = True or the worker argument of register_component)
+        has its own mailbox and worker thread, and all of its interfaces run on the thread one by one (actor).
+        execute_interface, execute_interface_async and get_interface of the component also go through the mailbox.
+        A coroutine interface of the component runs on the System event loop while the worker waits for it,
+            so it should not wait for the other interfaces of its own component.
+        When the mailbox has mailbox_size messages (0 is unbounded), the caller waits until a message is taken.
+        The worker is found by the component name of the interfaces, so register interfaces with the class name.
+        Do not wait for each other by execute_interface between worker components, it does not end.
+    The interfaces of the other components run on the thread pool of System (executor_workers threads).
+        When pool_queue_size calls are waiting or running (None is unbounded), submit_interface waits.
+    So a slow component does not stall the others, and heavy components process the requests in parallel.
+
+    A component with process (Component.process = True or the process argument of register_component)
+        is created in a child process, so a CPU heavy component is not limited by the GIL of the main process.
+        The child reports the interfaces what its initial registers, and the same interfaces are registered in System.
+        So the interfaces are executed in the same way, the arguments and the result are sent by a pipe.
+        A DictList argument or result is sent by shared memory instead of the pipe,
+            as a columnar snapshot (dictlist.dump_snapshot(columnar=True)) what keeps number columns as raw buffers.
+        The child uses the same Log configuration, but it has its own System, so it can not execute the interfaces of
+            the components in the main process. The constructor should be a class what can be imported (not local).
+        The child processes are stopped at the exit, or when stop_processes() is called.
+
     Methods:
         register_interface(component, command, argument_numbers, func) : registering interface
         execute_interface(component, command, *arguments) : executing interface
+        func = get_interface(component, command) : getting the function of interface to call it directly
+        result = await execute_interface_async(component, command, *arguments) : executing interface in an event loop
+        future = submit_interface(component, command, *arguments) : executing interface on a worker, future.result()
 
-        register_component(constructor)
+        register_component(constructor, dependencies=None, worker=None, mailbox_size=None, process=None)
         register_components(constructors)
         components = get_components() : getting the registered components
-        startup_components() : creating registered components and calling the initial function of the components
+        timings = startup_components(parallel=False, max_workers=None)
+            : creating registered components and calling the initial function of the components
 
         start_interface_prompt()
 
@@ -44,6 +101,20 @@ class System:
     """
 
     interface_dictlist = DictList()
+    interfaces = dict()
+
+    loop = None
+    loop_thread = None
+    executor = None
+    executor_workers = None
+    pool_queue_size = None
+    pool_semaphore = None
+    loop_lock = threading.Lock()
+
+    register_lock = threading.RLock()
+
+    workers = dict()
+    processes = list()
     component_dictlist = DictList()
 
     is_prompt_started = False
@@ -51,10 +122,12 @@ class System:
     @staticmethod
     def register_interface(component, command, argument_numbers, func):
         try:
-            if not System.interface_dictlist.get([{'key': 'component', 'value': component},
-                                                  {'key': 'command', 'value': command}]):
-                System.interface_dictlist.append(
-                    {'component': component, 'command': command, 'argument_numbers': argument_numbers, 'func': func})
+            with System.register_lock:
+                if (component, command) not in System.interfaces:
+                    System.interfaces[(component, command)] = \
+                        (frozenset(argument_numbers), func, inspect.iscoroutinefunction(func))
+                    System.interface_dictlist.append(
+                        {'component': component, 'command': command, 'argument_numbers': argument_numbers, 'func': func})
         except Exception as error:
             print(f'error: {error} / System.register_interface(component:{component}/{type(component)},',
                   f'command:{command}/{type(command)},')
@@ -63,13 +136,20 @@ class System:
     @staticmethod
     def execute_interface(component, command, *arguments):
         try:
-            interface = System.interface_dictlist.get([
-                {'key': 'component', 'value': component},
-                {'key': 'command', 'value': command}
-            ])
+            interface = System.interfaces.get((component, command))
+
+            if interface is not None and len(arguments) in interface[0]:
+                if interface[2] and threading.current_thread() is System.loop_thread:
+                    raise RuntimeError('a coroutine interface can not wait in the System loop, use execute_interface_async')
+
+                worker = System.workers.get(component)
+                if worker is not None:
+                    return worker.submit(System.get_worker_func(interface), arguments).result()
+
+                if interface[2]:
+                    return asyncio.run_coroutine_threadsafe(interface[1](*arguments), System.get_loop()).result()
 
-            if interface and len(arguments) in interface['argument_numbers']:
-                return interface['func'](*arguments)
+                return interface[1](*arguments)
 
             return None
         except Exception as error:
@@ -79,19 +159,134 @@ class System:
             return None
 
     @staticmethod
-    def register_component(constructor):
+    async def execute_interface_async(component, command, *arguments):
         try:
-            if not System.component_dictlist.get('constructor', constructor):
-                System.component_dictlist.append({'constructor': constructor, 'handler': None, 'init': False})
+            interface = System.interfaces.get((component, command))
+
+            if interface is not None and len(arguments) in interface[0]:
+                loop = System.get_loop()
+                caller_loop = asyncio.get_running_loop()
+
+                worker = System.workers.get(component)
+                if worker is not None:
+                    return await asyncio.wrap_future(worker.submit(System.get_worker_func(interface), arguments))
+
+                if interface[2]:
+                    if caller_loop is loop:
+                        return await interface[1](*arguments)
+
+                    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(interface[1](*arguments), loop))
+
+                return await caller_loop.run_in_executor(System.executor, functools.partial(interface[1], *arguments))
+
+            return None
         except Exception as error:
-            print(f'error: {error} / System.register_component(constructor:{constructor}/{type(constructor)})')
+            print(f'error: {error} / System.execute_interface_async(component:{component}/{type(component)},',
+                  f'command:{command}/{type(command)},')
+            print(f'\t*arguments:{arguments}/{type(arguments)})')
+            return None
 
     @staticmethod
-    def register_components(constructors):
+    def submit_interface(component, command, *arguments):
+        try:
+            interface = System.interfaces.get((component, command))
+
+            if interface is not None and len(arguments) in interface[0]:
+                worker = System.workers.get(component)
+                if worker is not None:
+                    return worker.submit(System.get_worker_func(interface), arguments)
+
+                if interface[2]:
+                    return asyncio.run_coroutine_threadsafe(interface[1](*arguments), System.get_loop())
+
+                System.get_loop()
+                if System.pool_semaphore is None:
+                    return System.executor.submit(interface[1], *arguments)
+
+                System.pool_semaphore.acquire()
+                try:
+                    future = System.executor.submit(interface[1], *arguments)
+                except Exception:
+                    System.pool_semaphore.release()
+                    raise
+
+                future.add_done_callback(lambda _: System.pool_semaphore.release())
+                return future
+        except Exception as error:
+            print(f'error: {error} / System.submit_interface(component:{component}/{type(component)},',
+                  f'command:{command}/{type(command)},')
+            print(f'\t*arguments:{arguments}/{type(arguments)})')
+
+        future = concurrent.futures.Future()
+        future.set_result(None)
+        return future
+
+    @staticmethod
+    def get_loop():
+        # the event loop and the thread pool of System are started by the first call
+        if System.loop is None:
+            with System.loop_lock:
+                if System.loop is None:
+                    System.executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=System.executor_workers, thread_name_prefix='SystemExecutor')
+                    if System.pool_queue_size:
+                        System.pool_semaphore = threading.BoundedSemaphore(System.pool_queue_size)
+
+                    loop = asyncio.new_event_loop()
+                    loop.set_default_executor(System.executor)
+                    System.loop_thread = threading.Thread(target=loop.run_forever, name='SystemLoop', daemon=True)
+                    System.loop_thread.start()
+                    System.loop = loop
+
+        return System.loop
+
+    @staticmethod
+    def get_interface(component, command):
+        try:
+            interface = System.interfaces.get((component, command))
+            if interface is None:
+                return None
+
+            # the interface of a worker component is called through the mailbox
+            worker = System.workers.get(component)
+            if worker is not None:
+                return functools.partial(worker.call, System.get_worker_func(interface))
+
+            return interface[1]
+        except Exception as error:
+            print(f'error: {error} / System.get_interface(component:{component}/{type(component)},',
+                  f'command:{command}/{type(command)})')
+            return None
+
+    @staticmethod
+    def get_worker_func(interface):
+        # a coroutine interface of a worker component runs on the System loop, and the worker waits for its end
+        return functools.partial(System.run_coroutine, interface[1]) if interface[2] else interface[1]
+
+    @staticmethod
+    def run_coroutine(func, *arguments):
+        return asyncio.run_coroutine_threadsafe(func(*arguments), System.get_loop()).result()
+
+    @staticmethod
+    def register_component(constructor, dependencies=None, worker=None, mailbox_size=None, process=None):
         try:
-            for constructor in constructors:
+            with System.register_lock:
                 if not System.component_dictlist.get('constructor', constructor):
-                    System.component_dictlist.append({'constructor': constructor, 'handler': None, 'init': False})
+                    System.component_dictlist.append(
+                        System.make_component(constructor, dependencies, worker, mailbox_size, process))
+        except Exception as error:
+            print(f'error: {error} / System.register_component(constructor:{constructor}/{type(constructor)},',
+                  f'dependencies:{dependencies}/{type(dependencies)},')
+            print(f'\tworker:{worker}/{type(worker)}, mailbox_size:{mailbox_size}/{type(mailbox_size)},',
+                  f'process:{process}/{type(process)})')
+
+    @staticmethod
+    def register_components(constructors):
+        try:
+            with System.register_lock:
+                for constructor in constructors:
+                    if not System.component_dictlist.get('constructor', constructor):
+                        System.component_dictlist.append(System.make_component(constructor))
         except Exception as error:
             print(f'error: {error} / System.register_components(constructor:{constructors}/{type(constructors)})')
 
@@ -103,17 +298,107 @@ class System:
             print(f'error: {error} / System.get_components()')
 
     @staticmethod
-    def startup_components():
+    def make_component(constructor, dependencies=None, worker=None, mailbox_size=None, process=None):
+        dependencies = dependencies if dependencies is not None else getattr(constructor, 'dependencies', ())
+        dependencies = [dependency if isinstance(dependency, str) else dependency.__name__ for dependency in dependencies]
+
+        worker = worker if worker is not None else getattr(constructor, 'worker', False)
+        mailbox_size = mailbox_size if mailbox_size is not None else getattr(constructor, 'mailbox_size', 0)
+        if worker and constructor.__name__ not in System.workers:
+            System.workers[constructor.__name__] = ComponentWorker(constructor.__name__, mailbox_size)
+            System.workers[constructor.__name__].start()
+
+        process = process if process is not None else getattr(constructor, 'process', False)
+
+        return {'constructor': constructor, 'handler': None, 'init': False, 'dependencies': dependencies,
+                'process': bool(process)}
+
+    @staticmethod
+    def startup_components(parallel=False, max_workers=None):
         try:
+            components = dict()
             for component in System.component_dictlist.get_list():
-                if not component['handler']:
-                    component['handler'] = component['constructor']()
+                components[component['constructor'].__name__] = component
 
+            started = set(name for name, component in components.items() if component['init'])
+            waiting = dict()
+            for name, component in components.items():
                 if not component['init']:
-                    component['handler'].initial()
-                    component['init'] = True
+                    waiting[name] = set(component['dependencies'])
+                    for dependency in waiting[name] - components.keys():
+                        print(f'error: {dependency} is not registered / System.startup_components() of {name}')
+
+            timings = dict()
+            if not parallel:
+                while True:
+                    name = next((name for name, dependencies in waiting.items() if dependencies <= started), None)
+                    if name is None:
+                        break
+
+                    del waiting[name]
+                    timing = System.startup_component(components[name])
+                    if timing is not None:
+                        timings[name] = timing
+                        started.add(name)
+            else:
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='SystemStartup')
+                running = dict()
+                while True:
+                    for name in [name for name, dependencies in waiting.items() if dependencies <= started]:
+                        del waiting[name]
+                        running[executor.submit(System.startup_component, components[name])] = name
+
+                    if not running:
+                        break
+
+                    finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in finished:
+                        name = running.pop(future)
+                        timing = future.result()
+                        if timing is not None:
+                            timings[name] = timing
+                            started.add(name)
+
+                executor.shutdown()
+
+            if waiting:
+                print(f'error: not started components {list(waiting)} / System.startup_components()')
+                print('\ta dependency is not registered, failed or circular')
+
+            return timings
         except Exception as error:
-            print(f'error: {error} / System.get_components()')
+            print(f'error: {error} / System.startup_components(parallel:{parallel}/{type(parallel)},',
+                  f'max_workers:{max_workers}/{type(max_workers)})')
+            return dict()
+
+    @staticmethod
+    def startup_component(component):
+        # returning the seconds of creating and initializing the component, or None when it fails
+        try:
+            start_time = time.perf_counter()
+
+            if not component['handler']:
+                if component.get('process'):
+                    component['handler'] = ComponentProcess(component['constructor'])
+                else:
+                    component['handler'] = component['constructor']()
+
+            if not component['init']:
+                component['handler'].initial()
+                component['init'] = True
+
+            return time.perf_counter() - start_time
+        except Exception as error:
+            print(f'error: {error} / System.startup_component(component:{component}/{type(component)})')
+            return None
+
+    @staticmethod
+    def stop_processes():
+        try:
+            while System.processes:
+                System.processes.pop().stop()
+        except Exception as error:
+            print(f'error: {error} / System.stop_processes()')
 
     @staticmethod
     def start_interface_prompt():
@@ -142,6 +427,208 @@ class System:
             print(f'error: {error} / System.start_interface_prompt()')
 
 
+class ComponentWorker(threading.Thread):
+    # the mailbox and the thread of a component, the messages are run one by one in the order
+    def __init__(self, name, mailbox_size=0):
+        super().__init__(name=f'ComponentWorker-{name}', daemon=True)
+
+        self.mailbox = queue.Queue(maxsize=mailbox_size)
+
+    def submit(self, func, arguments):
+        future = concurrent.futures.Future()
+
+        # a message from the worker itself is run at once, waiting for it in the mailbox does not end
+        if threading.current_thread() is self:
+            self.run_message(future, func, arguments)
+        else:
+            self.mailbox.put((future, func, arguments))
+
+        return future
+
+    def call(self, func, *arguments):
+        return self.submit(func, arguments).result()
+
+    def run(self):
+        while True:
+            message = self.mailbox.get()
+            if message is None:
+                break
+
+            self.run_message(*message)
+
+    @staticmethod
+    def run_message(future, func, arguments):
+        if not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            future.set_result(func(*arguments))
+        except BaseException as error:
+            future.set_exception(error)
+
+    def stop(self):
+        self.mailbox.put(None)
+        self.join()
+
+
+class SharedValue:
+    # the mark of a value what is in shared memory
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+
+def share_value(value):
+    if not isinstance(value, DictList):
+        return value
+
+    # the chunks of the snapshot are written into the shared memory one by one, they are not joined before
+    chunks = value.dump_snapshot(columnar=True)
+    size = sum(map(len, chunks))
+
+    memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        position = 0
+        for chunk in chunks:
+            memory.buf[position:position + len(chunk)] = chunk
+            position = position + len(chunk)
+    except BaseException:
+        memory.close()
+        memory.unlink()
+        raise
+
+    memory.close()
+    return SharedValue(memory.name, size)
+
+
+def load_value(value):
+    # the receiver of a shared value releases the shared memory
+    if not isinstance(value, SharedValue):
+        return value
+
+    memory = shared_memory.SharedMemory(name=value.name)
+    view = memory.buf[:value.size]
+    try:
+        dictlist = DictList.read_snapshot(view)
+
+        # the buffer columns refer the shared memory, so they are copied before it is released
+        if isinstance(dictlist.data, ColumnarList):
+            dictlist.data.materialize()
+
+        return dictlist
+    finally:
+        memory.unlink()
+        view.release()
+        memory.close()
+
+
+def release_values(values):
+    # the shared values what are not taken by the receiver are released by the sender
+    for value in values:
+        if isinstance(value, SharedValue):
+            try:
+                memory = shared_memory.SharedMemory(name=value.name)
+                memory.close()
+                memory.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ComponentProcess:
+    """
+    ComponentProcess is the handler of a component in a child process.
+    initial() starts the process and registers the interfaces of the child, the calls are sent one by one.
+    """
+
+    def __init__(self, constructor):
+        context = multiprocessing.get_context('spawn')
+
+        self.constructor = constructor
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=host_component, args=(constructor, child_connection, Log.get_configuration()),
+                                       name=f'ComponentProcess-{constructor.__name__}', daemon=True)
+        self.lock = threading.Lock()
+
+    def initial(self):
+        with System.register_lock:
+            if not System.processes:
+                atexit.register(System.stop_processes)
+            System.processes.append(self)
+
+        self.process.start()
+
+        interfaces = self.connection.recv()
+        if isinstance(interfaces, BaseException):
+            raise interfaces
+
+        for component, command, argument_numbers in interfaces:
+            System.register_interface(component, command, argument_numbers, functools.partial(self.call, component, command))
+
+    def call(self, component, command, *arguments):
+        with self.lock:
+            values = list()
+            try:
+                for argument in arguments:
+                    values.append(share_value(argument))
+
+                self.connection.send((component, command, values))
+                result = self.connection.recv()
+            except BaseException:
+                # the child may die before taking the arguments
+                release_values(values)
+                raise
+
+            return load_value(result)
+
+    def stop(self):
+        with self.lock:
+            if self.process.is_alive():
+                try:
+                    self.connection.send(None)
+                except OSError:
+                    # the child is ended already
+                    pass
+                self.process.join(5)
+
+
+def host_component(constructor, connection, log_configuration):
+    # the main function of a child process, it runs the component and the interface calls of the parent
+    try:
+        Log.configure(**log_configuration)
+
+        handler = constructor()
+        handler.initial()
+
+        connection.send([(interface['component'], interface['command'], list(interface['argument_numbers']))
+                         for interface in System.interface_dictlist.get_list()])
+    except Exception as error:
+        connection.send(RuntimeError(f'{constructor.__name__} is not started in the process, {error}'))
+        return
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+
+        if message is None:
+            break
+
+        component, command, arguments = message
+        result = System.execute_interface(component, command, *[load_value(argument) for argument in arguments])
+
+        value = None
+        try:
+            value = share_value(result)
+            connection.send(value)
+        except Exception as error:
+            release_values([value])
+            print(f'error: {error} / host_component(constructor:{constructor}/{type(constructor)})')
+            connection.send(None)
+
+    Log.shutdown()
+
+
 class Prompt(cmd.Cmd):
     intro = 'help : print user commands what are registered' \
             + '\nexit : quit the prompt'